@@ -4,31 +4,27 @@ import zipfile
 import tempfile
 import shutil
 import json
-from importlib import import_module
 from llmWrapper.offline_translation import populate_sum_model
+from llmWrapper.client_pool import close_all
 from typing import List, Tuple
 from config.log_config import app_logger
 import socket
 import sys
 import base64
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import language configs
 from config.languages_config import LANGUAGE_MAP, LABEL_TRANSLATIONS
+from translator.registry import get_translator_class
 
 #-------------------------------------------------------------------------
 # Constants and Configuration
 #-------------------------------------------------------------------------
 
-# Dictionary mapping file extensions to their corresponding translator module paths
-TRANSLATOR_MODULES = {
-    ".docx": "translator.word_translator.WordTranslator",
-    ".pptx": "translator.ppt_translator.PptTranslator",
-    ".xlsx": "translator.excel_translator.ExcelTranslator",
-    ".pdf": "translator.pdf_translator.PdfTranslator",
-    ".srt": "translator.subtile_translator.SubtitlesTranslator",
-    ".txt": "translator.txt_translator.TxtTranslator",
-    # ".epub": "translator.epub_translator.EpubTranslator"
-}
+# Outputs that are already compressed zip containers are stored as-is in the batch archive
+STORED_EXTENSIONS = {".docx", ".xlsx", ".pptx", ".epub"}
 
 #-------------------------------------------------------------------------
 # System Configuration Functions
@@ -71,6 +67,13 @@ def update_online_mode(use_online):
     write_system_config(config)
     return config["default_online"]
 
+def update_resume_jobs(resume_jobs):
+    """Update system config with new resume setting."""
+    config = read_system_config()
+    config["resume_jobs"] = resume_jobs
+    write_system_config(config)
+    return config["resume_jobs"]
+
 def update_max_retries(max_retries):
     """Update system config with new max retries setting."""
     config = read_system_config()
@@ -172,19 +175,21 @@ def set_labels(session_lang: str):
         # Modify existing label for multiple files
         file_upload_label = labels["Upload File"] + "s"
     
-    return {
-        src_lang: gr.update(label=labels["Source Language"]),
-        dst_lang: gr.update(label=labels["Target Language"]),
-        use_online_model: gr.update(label=labels["Use Online Model"]),
-        lan_mode_checkbox: gr.update(label=labels["Local Network Mode (Restart to Apply)"]),
-        model_choice: gr.update(label=labels["Models"]),
-        max_retries_slider: gr.update(label=labels["Max Retries"]),
-        api_key_input: gr.update(label=labels["API Key"]),
-        file_input: gr.update(label=file_upload_label),
-        output_file: gr.update(label=labels["Download Translated File"]),
-        status_message: gr.update(label=labels["Status Message"]),
-        translate_button: gr.update(value=labels["Translate"])
-    }
+    # In the order of the label outputs of demo.load
+    return [
+        gr.update(label=labels["Source Language"]),  # src_lang
+        gr.update(label=labels["Target Language"]),  # dst_lang
+        gr.update(label=labels["Use Online Model"]),  # use_online_model
+        gr.update(label=labels["Local Network Mode (Restart to Apply)"]),  # lan_mode_checkbox
+        gr.update(label=labels["Models"]),  # model_choice
+        gr.update(label=labels["Max Retries"]),  # max_retries_slider
+        gr.update(label=labels["Resume Unfinished Jobs"]),  # resume_jobs_checkbox
+        gr.update(label=labels["API Key"]),  # api_key_input
+        gr.update(label=file_upload_label),  # file_input
+        gr.update(label=labels["Download Translated File"]),  # output_file
+        gr.update(label=labels["Status Message"]),  # status_message
+        gr.update(value=labels["Translate"]),  # translate_button
+    ]
 
 #-------------------------------------------------------------------------
 # UI and Model Functions
@@ -242,35 +247,15 @@ def init_ui(request: gr.Request):
         use_online_value,
         model_choices,
         model_value
-    ] + list(label_updates.values())
+    ] + label_updates
 
 #-------------------------------------------------------------------------
 # Translation Processing Functions
 #-------------------------------------------------------------------------
 
-def get_translator_class(file_extension):
-    """Dynamically import and return the appropriate translator class for the file extension."""
-    module_path = TRANSLATOR_MODULES.get(file_extension.lower())
-    if not module_path:
-        return None
-    
-    try:
-        # Split into module path and class name
-        module_name, class_name = module_path.rsplit('.', 1)
-        
-        # Import the module
-        module = import_module(module_name)
-        
-        # Get the class
-        translator_class = getattr(module, class_name)
-        return translator_class
-    except (ImportError, AttributeError) as e:
-        app_logger.exception(f"Error importing translator for {file_extension}: {e}")
-        return None
-
 def translate_files(
     files, model, src_lang, dst_lang, use_online, api_key, max_retries=4, max_token=768,
-    progress=gr.Progress(track_tqdm=True)
+    resume=False, progress=gr.Progress(track_tqdm=True)
 ):
     """Translate one or multiple files using the chosen model."""
     if not files:
@@ -290,19 +275,19 @@ def translate_files(
     if isinstance(files, list) and len(files) > 1:
         return process_multiple_files(
             files, model, src_lang_code, dst_lang_code, 
-            use_online, api_key, max_token, max_retries, progress_callback
+            use_online, api_key, max_token, max_retries, progress_callback, resume
         )
     else:
         # Handle single file case
         single_file = files[0] if isinstance(files, list) else files
         return process_single_file(
             single_file, model, src_lang_code, dst_lang_code, 
-            use_online, api_key, max_token, max_retries, progress_callback
+            use_online, api_key, max_token, max_retries, progress_callback, resume
         )
 
 def process_single_file(
     file, model, src_lang_code, dst_lang_code, 
-    use_online, api_key, max_token, max_retries, progress_callback
+    use_online, api_key, max_token, max_retries, progress_callback, resume=False
 ):
     """Process a single file for translation."""
     file_name, file_extension = os.path.splitext(file.name)
@@ -317,7 +302,13 @@ def process_single_file(
     try:
         translator = translator_class(
             file.name, model, use_online, api_key,
-            src_lang_code, dst_lang_code, max_token=max_token, max_retries=max_retries
+            src_lang_code, dst_lang_code, max_token=max_token, max_retries=max_retries,
+            context_mode=initial_context_mode,
+            use_translation_memory=initial_translation_memory,
+            resume=resume,
+            workspace_root=initial_workspace_root,
+            result_root=initial_result_root,
+            wire_format=initial_wire_format
         )
         progress_callback(0, desc="Initializing translation...")
 
@@ -339,9 +330,12 @@ def process_single_file(
 
 def process_multiple_files(
     files, model, src_lang_code, dst_lang_code, 
-    use_online, api_key, max_token, max_retries, progress_callback
+    use_online, api_key, max_token, max_retries, progress_callback, resume=False
 ):
-    """Process multiple files and return a zip archive."""
+    """
+    Process multiple files on a pool of up to initial_max_parallel_files workers and return a zip archive.
+    Finished outputs are added to the archive as they complete; a failing file is logged and skipped.
+    """
     # Create a temporary directory for the translated files
     temp_dir = tempfile.mkdtemp(prefix="translated_")
     zip_path = os.path.join(temp_dir, "translated_files.zip")
@@ -361,55 +355,87 @@ def process_multiple_files(
             shutil.rmtree(temp_dir)
             return gr.update(value=None, visible=False), "No supported files found."
         
-        # Create a zip file
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            total_files = len(valid_files)
+        total_files = len(valid_files)
+        file_progress_values = [0.0] * total_files
+        progress_lock = threading.Lock()
+        
+        # Create output directory
+        output_dir = os.path.join(temp_dir, "files")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        def translate_one(i, file_obj, rel_path):
+            file_name, file_extension = os.path.splitext(file_obj.name)
+            base_name = os.path.basename(file_name)
             
-            for i, (file_obj, rel_path) in enumerate(valid_files):
-                file_name, file_extension = os.path.splitext(file_obj.name)
-                base_name = os.path.basename(file_name)
-                
-                # Update progress with initial file info
-                progress_callback(i / total_files, desc=f"Starting to process {rel_path} (File {i+1}/{total_files})")
-                
-                # Create translator for this file
-                translator_class = get_translator_class(file_extension)
-                if not translator_class:
-                    continue  # Skip unsupported files (should not happen due to earlier validation)
-                
-                try:
-                    # Process file
-                    translator = translator_class(
-                        file_obj.name, model, use_online, api_key,
-                        src_lang_code, dst_lang_code, max_token=max_token, max_retries=max_retries
-                    )
-                    
-                    # Create output directory
-                    output_dir = os.path.join(temp_dir, "files")
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # Create progress callback that shows individual file progress and overall position
-                    def file_progress(value, desc=None):
-                        file_desc = desc if desc else ""
-                        overall_info = f" (File {i+1}/{total_files})"
-                        progress_callback(i / total_files + value / total_files, desc=f"{file_desc}{overall_info}")
+            # Create progress callback that reports the average progress over all files
+            def file_progress(value, desc=None):
+                with progress_lock:
+                    file_progress_values[i] = min(max(value or 0, file_progress_values[i]), 1.0)
+                    overall = sum(file_progress_values) / total_files
+                    file_desc = f"{rel_path}: {desc}" if desc else rel_path
+                    progress_callback(overall, desc=f"{file_desc} (File {i+1}/{total_files})")
+            
+            file_progress(0, desc="Starting to process")
+            translator_class = get_translator_class(file_extension)
+            translator = translator_class(
+                file_obj.name, model, use_online, api_key,
+                src_lang_code, dst_lang_code, max_token=max_token, max_retries=max_retries,
+                context_mode=initial_context_mode,
+                use_translation_memory=initial_translation_memory,
+                resume=resume,
+                workspace_root=initial_workspace_root,
+                result_root=initial_result_root,
+                wire_format=initial_wire_format
+            )
+            translated_file_path, _ = translator.process(
+                os.path.join(output_dir, base_name),
+                file_extension,
+                progress_callback=file_progress
+            )
+            with progress_lock:
+                file_progress_values[i] = 1.0
+            return translated_file_path
+        
+        processed_files = 0
+        failed_files = []
+        archive_names = set()
+        
+        # Create a zip file and add each output as soon as it is done
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            with ThreadPoolExecutor(max_workers=max(1, initial_max_parallel_files)) as executor:
+                futures = {
+                    executor.submit(translate_one, i, file_obj, rel_path): rel_path
+                    for i, (file_obj, rel_path) in enumerate(valid_files)
+                }
+                for future in as_completed(futures):
+                    rel_path = futures[future]
+                    try:
+                        translated_file_path = future.result()
+                    except Exception as e:
+                        app_logger.exception(f"Error processing file {rel_path}: {e}")
+                        failed_files.append(rel_path)
+                        continue
                     
-                    translated_file_path, _ = translator.process(
-                        os.path.join(output_dir, base_name),
-                        file_extension,
-                        progress_callback=file_progress
-                    )
+                    # Keep names unique when two uploads share a basename
+                    archive_name = os.path.basename(translated_file_path)
+                    stem, ext = os.path.splitext(archive_name)
+                    suffix = 1
+                    while archive_name in archive_names:
+                        archive_name = f"{stem}_{suffix}{ext}"
+                        suffix += 1
+                    archive_names.add(archive_name)
                     
-                    # Add to zip
-                    zipf.write(
-                        translated_file_path, 
-                        os.path.basename(translated_file_path)
-                    )
-                except Exception as e:
-                    app_logger.exception(f"Error processing file {rel_path}: {e}")
-                    # Continue with next file
+                    # Office documents and EPUBs are zip containers already, deflating them again only costs time
+                    compress_type = zipfile.ZIP_STORED if ext.lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                    zipf.write(translated_file_path, archive_name, compress_type=compress_type)
+                    processed_files += 1
         
         progress_callback(1, desc="Done!")
+        if failed_files:
+            return gr.update(value=zip_path, visible=True), (
+                f"Translation completed. {processed_files} files processed, "
+                f"{len(failed_files)} failed: {', '.join(failed_files)}"
+            )
         return gr.update(value=zip_path, visible=True), f"Translation completed. {total_files} files processed."
     
     except Exception as e:
@@ -421,205 +447,243 @@ def process_multiple_files(
 # Main Application Initialization
 #-------------------------------------------------------------------------
 
-# Load local and online models
-local_models = populate_sum_model() or []
-config_dir = "config/api_config"
-online_models = [
-    os.path.splitext(f)[0] for f in os.listdir(config_dir) 
-    if f.endswith(".json") and f != "Custom.json"
-]
-
-# Read initial configuration
-config = read_system_config()
-initial_lan_mode = config.get("lan_mode", False)
-initial_default_online = config.get("default_online", False)
-initial_max_token = config.get("max_token", 768)
-initial_max_retries = config.get("max_retries", 4)
-app_title = config.get("app_title", "LinguaHaru")
-img_path = config.get("img_path", "img/ico.ico")
-
-# Update global MAX_TOKEN from config
-MAX_TOKEN = initial_max_token
-
-# Get show_model_selection and show_mode_switch from config
-initial_show_model_selection = config.get("show_model_selection", True)
-initial_show_mode_switch = config.get("show_mode_switch", True)
-initial_show_lan_mode = config.get("show_lan_mode", True)
-
-
-icon_path = resource_path(img_path)
-image_type = img_path.split('.')[-1].lower()
-mime_types = {
-    'ico': 'image/x-icon',
-    'png': 'image/png',
-    'jpg': 'image/jpeg',
-    'jpeg': 'image/jpeg',
-    'gif': 'image/gif',
-    'svg': 'image/svg+xml'
-}
-mime_type = mime_types.get(image_type, 'image/png')
-with open(icon_path, "rb") as f:
-    encoded_image = base64.b64encode(f.read()).decode("utf-8")
+def main():
+    """Load the models and configuration, build the UI and launch it."""
+    # Read by the event handlers above
+    global local_models, online_models, MAX_TOKEN
+    global initial_context_mode, initial_translation_memory, initial_workspace_root
+    global initial_result_root, initial_max_parallel_files, initial_wire_format
+
+    # Load local and online models
+    local_models = populate_sum_model() or []
+    config_dir = "config/api_config"
+    online_models = [
+        os.path.splitext(f)[0] for f in os.listdir(config_dir) 
+        if f.endswith(".json") and f != "Custom.json"
+    ]
+
+    # Read initial configuration
+    config = read_system_config()
+    initial_lan_mode = config.get("lan_mode", False)
+    initial_default_online = config.get("default_online", False)
+    initial_max_token = config.get("max_token", 768)
+    initial_max_retries = config.get("max_retries", 4)
+    initial_context_mode = config.get("context_mode", "translated")
+    initial_translation_memory = config.get("translation_memory", False)
+    initial_resume_jobs = config.get("resume_jobs", False)
+    initial_workspace_root = config.get("workspace_root", "temp")
+    initial_result_root = config.get("result_root", "result")
+    initial_max_parallel_files = config.get("max_parallel_files", 2)
+    initial_wire_format = config.get("wire_format", "json")
+    app_title = config.get("app_title", "LinguaHaru")
+    img_path = config.get("img_path", "img/ico.ico")
+
+    # Update global MAX_TOKEN from config
+    MAX_TOKEN = initial_max_token
+
+    # Get show_model_selection and show_mode_switch from config
+    initial_show_model_selection = config.get("show_model_selection", True)
+    initial_show_mode_switch = config.get("show_mode_switch", True)
+    initial_show_lan_mode = config.get("show_lan_mode", True)
+
+
+    icon_path = resource_path(img_path)
+    image_type = img_path.split('.')[-1].lower()
+    mime_types = {
+        'ico': 'image/x-icon',
+        'png': 'image/png',
+        'jpg': 'image/jpeg',
+        'jpeg': 'image/jpeg',
+        'gif': 'image/gif',
+        'svg': 'image/svg+xml'
+    }
+    mime_type = mime_types.get(image_type, 'image/png')
+    with open(icon_path, "rb") as f:
+        encoded_image = base64.b64encode(f.read()).decode("utf-8")
+
+    #-------------------------------------------------------------------------
+    # Gradio UI Construction
+    #-------------------------------------------------------------------------
+
+    # Create a Gradio blocks interface
+    with gr.Blocks(title=app_title, css="footer {visibility: hidden}") as demo:
+        gr.HTML(f"""
+        <div style="text-align: center;">
+            <h1>{app_title}</h1>
+            <img src="data:{mime_type};base64,{encoded_image}" alt="{app_title} Logo" 
+                 style="display: block; height: 100px; width: auto; margin: 0 auto;">
+        </div>
+        """)
+
+        # Custom footer with attribution and GitHub link
+        gr.HTML("""
+        <div style="position: fixed; bottom: 0; left: 0; width: 100%; 
+                  text-align: center; padding: 10px 0;">
+            Made by Haruka-YANG | Version: 2.2 | 
+            <a href="https://github.com/YANG-Haruka/LinguaHaru" target="_blank">Visit Github</a>
+        </div>
+        """)
+        session_lang = gr.State("en")
+        lan_mode_state = gr.State(initial_lan_mode)
+        default_online_state = gr.State(initial_default_online)
+        max_token_state = gr.State(initial_max_token)
+        max_retries_state = gr.State(initial_max_retries)
+
+        with gr.Row():
+            src_lang = gr.Dropdown(
+                [
+                    "English", "中文", "繁體中文", "日本語", "Español", 
+                    "Français", "Deutsch", "Italiano", "Português", 
+                    "Русский", "한국어", "ภาษาไทย", "Tiếng Việt"
+                ],
+                label="Source Language",
+                value="English"
+            )
+            dst_lang = gr.Dropdown(
+                [
+                    "English", "中文", "繁體中文", "日本語", "Español", 
+                    "Français", "Deutsch", "Italiano", "Português", 
+                    "Русский", "한국어", "ภาษาไทย", "Tiếng Việt"
+                ],
+                label="Target Language",
+                value="English"
+            )
 
-#-------------------------------------------------------------------------
-# Gradio UI Construction
-#-------------------------------------------------------------------------
+        # Settings section (always visible)
+        with gr.Row():
+            with gr.Column(scale=1):
+                use_online_model = gr.Checkbox(
+                    label="Use Online Model", 
+                    value=initial_default_online, 
+                    visible=initial_show_mode_switch
+                )
+
+            with gr.Column(scale=1):
+                lan_mode_checkbox = gr.Checkbox(
+                    label="Local Network Mode (Restart to Apply)", 
+                    value=initial_lan_mode,
+                    visible=initial_show_lan_mode
+                )
+
+        with gr.Row():
+            max_retries_slider = gr.Slider(
+                minimum=1,
+                maximum=10,
+                step=1,
+                value=initial_max_retries,
+                label="Max Retries"
+            )
+            resume_jobs_checkbox = gr.Checkbox(
+                label="Resume Unfinished Jobs",
+                value=initial_resume_jobs
+            )
 
-# Create a Gradio blocks interface
-with gr.Blocks(title=app_title, css="footer {visibility: hidden}") as demo:
-    gr.HTML(f"""
-    <div style="text-align: center;">
-        <h1>{app_title}</h1>
-        <img src="data:{mime_type};base64,{encoded_image}" alt="{app_title} Logo" 
-             style="display: block; height: 100px; width: auto; margin: 0 auto;">
-    </div>
-    """)
-    
-    # Custom footer with attribution and GitHub link
-    gr.HTML("""
-    <div style="position: fixed; bottom: 0; left: 0; width: 100%; 
-              text-align: center; padding: 10px 0;">
-        Made by Haruka-YANG | Version: 2.2 | 
-        <a href="https://github.com/YANG-Haruka/LinguaHaru" target="_blank">Visit Github</a>
-    </div>
-    """)
-    session_lang = gr.State("en")
-    lan_mode_state = gr.State(initial_lan_mode)
-    default_online_state = gr.State(initial_default_online)
-    max_token_state = gr.State(initial_max_token)
-    max_retries_state = gr.State(initial_max_retries)
-
-    with gr.Row():
-        src_lang = gr.Dropdown(
-            [
-                "English", "中文", "繁體中文", "日本語", "Español", 
-                "Français", "Deutsch", "Italiano", "Português", 
-                "Русский", "한국어", "ภาษาไทย", "Tiếng Việt"
-            ],
-            label="Source Language",
-            value="English"
+        # Model choice and API key input
+        with gr.Row():
+            model_choice = gr.Dropdown(
+                choices=local_models if not initial_default_online else online_models,
+                label="Models",
+                value=local_models[0] if not initial_default_online and local_models else (
+                    online_models[0] if initial_default_online and online_models else None
+                ),
+                visible=initial_show_model_selection,
+                allow_custom_value=True 
+            )
+
+        api_key_input = gr.Textbox(
+            label="API Key", 
+            placeholder="Enter your API key here", 
+            value="",
+            visible=initial_default_online
         )
-        dst_lang = gr.Dropdown(
-            [
-                "English", "中文", "繁體中文", "日本語", "Español", 
-                "Français", "Deutsch", "Italiano", "Português", 
-                "Русский", "한국어", "ภาษาไทย", "Tiếng Việt"
-            ],
-            label="Target Language",
-            value="English"
+
+        file_input = gr.File(
+            label="Upload Files (.docx, .pptx, .xlsx, .pdf, .srt, .txt)",
+            file_types=[".docx", ".pptx", ".xlsx", ".pdf", ".srt", ".txt"],
+            file_count="multiple"
+        )
+        output_file = gr.File(label="Download Translated File", visible=False)
+        status_message = gr.Textbox(label="Status Message", interactive=False, visible=True)
+        translate_button = gr.Button("Translate")
+
+        # Event handlers
+        use_online_model.change(
+            update_model_list_and_api_input,
+            inputs=use_online_model,
+            outputs=[model_choice, api_key_input]
         )
 
-    # Settings section (always visible)
-    with gr.Row():
-        with gr.Column(scale=1):
-            use_online_model = gr.Checkbox(
-                label="Use Online Model", 
-                value=initial_default_online, 
-                visible=initial_show_mode_switch
-            )
-        
-        with gr.Column(scale=1):
-            lan_mode_checkbox = gr.Checkbox(
-                label="Local Network Mode (Restart to Apply)", 
-                value=initial_lan_mode,
-                visible=initial_show_lan_mode
-            )
-    
-    with gr.Row():
-        max_retries_slider = gr.Slider(
-            minimum=1,
-            maximum=10,
-            step=1,
-            value=initial_max_retries,
-            label="Max Retries"
+        # Add LAN mode
+        lan_mode_checkbox.change(
+            update_lan_mode,
+            inputs=lan_mode_checkbox,
+            outputs=lan_mode_state
         )
 
-    # Model choice and API key input
-    with gr.Row():
-        model_choice = gr.Dropdown(
-            choices=local_models if not initial_default_online else online_models,
-            label="Models",
-            value=local_models[0] if not initial_default_online and local_models else (
-                online_models[0] if initial_default_online and online_models else None
-            ),
-            visible=initial_show_model_selection,
-            allow_custom_value=True 
+        # Add Max Retries
+        max_retries_slider.change(
+            update_max_retries,
+            inputs=max_retries_slider,
+            outputs=max_retries_state
         )
 
-    api_key_input = gr.Textbox(
-        label="API Key", 
-        placeholder="Enter your API key here", 
-        value="",
-        visible=initial_default_online
-    )
-    
-    file_input = gr.File(
-        label="Upload Files (.docx, .pptx, .xlsx, .pdf, .srt, .txt)",
-        file_types=[".docx", ".pptx", ".xlsx", ".pdf", ".srt", ".txt"],
-        file_count="multiple"
-    )
-    output_file = gr.File(label="Download Translated File", visible=False)
-    status_message = gr.Textbox(label="Status Message", interactive=False, visible=True)
-    translate_button = gr.Button("Translate")
-
-    # Event handlers
-    use_online_model.change(
-        update_model_list_and_api_input,
-        inputs=use_online_model,
-        outputs=[model_choice, api_key_input]
-    )
-    
-    # Add LAN mode
-    lan_mode_checkbox.change(
-        update_lan_mode,
-        inputs=lan_mode_checkbox,
-        outputs=lan_mode_state
-    )
-    
-    # Add Max Retries
-    max_retries_slider.change(
-        update_max_retries,
-        inputs=max_retries_slider,
-        outputs=max_retries_state
-    )
-
-    # Hide download button and reset status first
-    translate_button.click(
-        lambda: (gr.update(visible=False), None),
-        inputs=[],
-        outputs=[output_file, status_message]
-    )
-
-    # Then translate
-    translate_button.click(
-        translate_files,
-        inputs=[
-            file_input, model_choice, src_lang, dst_lang, 
-            use_online_model, api_key_input, max_retries_slider, max_token_state
-        ],
-        outputs=[output_file, status_message]
-    )
-
-    # On page load, set user language and labels
-    demo.load(
-        fn=init_ui,
-        inputs=None,
-        outputs=[
-            session_lang, lan_mode_state, default_online_state, max_token_state, max_retries_state,
-            use_online_model, model_choice, model_choice,
-            src_lang, dst_lang, use_online_model, lan_mode_checkbox,
-            model_choice, max_retries_slider, 
-            api_key_input, file_input, output_file, status_message, translate_button
-        ]
-    )
+        # Add resume setting
+        resume_jobs_checkbox.change(
+            update_resume_jobs,
+            inputs=resume_jobs_checkbox,
+            outputs=None
+        )
 
-#-------------------------------------------------------------------------
-# Application Launch
-#-------------------------------------------------------------------------
+        # Hide download button and reset status first
+        translate_button.click(
+            lambda: (gr.update(visible=False), None),
+            inputs=[],
+            outputs=[output_file, status_message]
+        )
+
+        # Then translate
+        translate_button.click(
+            translate_files,
+            inputs=[
+                file_input, model_choice, src_lang, dst_lang, 
+                use_online_model, api_key_input, max_retries_slider, max_token_state,
+                resume_jobs_checkbox
+            ],
+            outputs=[output_file, status_message]
+        )
+
+        # On page load, set user language and labels
+        demo.load(
+            fn=init_ui,
+            inputs=None,
+            outputs=[
+                session_lang, lan_mode_state, default_online_state, max_token_state, max_retries_state,
+                use_online_model, model_choice, model_choice,
+                src_lang, dst_lang, use_online_model, lan_mode_checkbox,
+                model_choice, max_retries_slider, resume_jobs_checkbox,
+                api_key_input, file_input, output_file, status_message, translate_button
+            ]
+        )
 
-available_port = find_available_port(start_port=9980)
+    #-------------------------------------------------------------------------
+    # Application Launch
+    #-------------------------------------------------------------------------
 
-if initial_lan_mode:
-    demo.launch(server_name="0.0.0.0", server_port=available_port, share=False, inbrowser=True)
-else:
-    demo.launch(server_port=available_port, share=False, inbrowser=True)
\ No newline at end of file
+    available_port = find_available_port(start_port=9980)
+
+    try:
+        if initial_lan_mode:
+            demo.launch(server_name="0.0.0.0", server_port=available_port, share=False, inbrowser=True)
+        else:
+            demo.launch(server_port=available_port, share=False, inbrowser=True)
+    finally:
+        # Close the pooled keep-alive connections to the model servers
+        close_all()
+
+
+# PDF page workers are separate processes that import this module again, so everything
+# beyond definitions happens in main()
+if __name__ == "__main__":
+    # Lets the packaged executable start the page workers instead of another app
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,161 @@
+"""
+Translate files from the command line, without the web UI.
+
+Inputs are files, directories (searched recursively) or glob patterns. Every
+translated file is written to the output directory under the same relative
+path it has below its input directory.
+
+    python cli.py docs/ --src en --dst ja --model qwen2.5
+    python cli.py "reports/**/*.xlsx" --src English --dst 中文 --model "(Deepseek) DeepSeek-V3" --online --parallel 4
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.log_config import app_logger
+from config.languages_config import LANGUAGE_MAP
+from config.load_config import load_json_config
+from llmWrapper.client_pool import close_all
+from translator.registry import TRANSLATOR_MODULES, get_translator_class
+
+SYSTEM_CONFIG_PATH = os.path.join("config", "system_config.json")
+
+
+def resolve_language(language):
+    """Accept a language code ("ja") or a name from LANGUAGE_MAP ("日本語")."""
+    if language in LANGUAGE_MAP:
+        return LANGUAGE_MAP[language]
+    if language in LANGUAGE_MAP.values():
+        return language
+    raise argparse.ArgumentTypeError(f"Unknown language '{language}'. Use one of: {', '.join(LANGUAGE_MAP.values())}")
+
+
+def collect_files(inputs):
+    """
+    Expand the inputs into (path, relative output path) pairs of supported files.
+    Files found in a directory keep their path below it; single files and glob
+    matches keep their path below the glob's fixed prefix.
+    """
+    collected = {}
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            root = pattern
+            matches = glob.glob(os.path.join(glob.escape(pattern), "**", "*"), recursive=True)
+        else:
+            # Everything before the first wildcard is the root of the mirrored tree
+            prefix = pattern.split("*", 1)[0].split("?", 1)[0].split("[", 1)[0]
+            root = prefix if prefix.endswith(os.sep) or os.path.isdir(prefix) else os.path.dirname(prefix)
+            matches = glob.glob(pattern, recursive=True)
+
+        for path in matches:
+            if not os.path.isfile(path) or os.path.splitext(path)[1].lower() not in TRANSLATOR_MODULES:
+                continue
+            collected.setdefault(os.path.abspath(path), os.path.relpath(path, root or "."))
+    return sorted(collected.items(), key=lambda item: item[1])
+
+
+def translate_file(path, rel_path, args, config, stats, stats_lock):
+    file_name, file_extension = os.path.splitext(path)
+    translator_class = get_translator_class(file_extension)
+    if not translator_class:
+        raise ValueError(f"Unsupported file type '{file_extension}'.")
+
+    translator = translator_class(
+        path, args.model, args.online, args.api_key,
+        args.src, args.dst, max_token=args.max_token, max_retries=args.max_retries,
+        context_mode=config.get("context_mode", "translated"),
+        use_translation_memory=args.translation_memory,
+        resume=args.resume,
+        workspace_root=config.get("workspace_root", "temp"),
+        result_root=config.get("result_root", "result"),
+        wire_format=config.get("wire_format", "json")
+    )
+    translated_file_path, missing_counts = translator.process(file_name, file_extension)
+
+    # Move the output into the mirrored tree and drop the job's now empty result folder
+    rel_stem, _ = os.path.splitext(rel_path)
+    target_path = os.path.join(args.output, f"{rel_stem}_translated{file_extension}")
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+    shutil.move(translated_file_path, target_path)
+    try:
+        os.rmdir(os.path.dirname(translated_file_path))
+    except OSError:
+        pass
+
+    with stats_lock:
+        stats["segments"] += translator.segments_sent
+        stats["tokens"] += translator.tokens_sent
+    return target_path, missing_counts
+
+
+def main():
+    config = load_json_config(SYSTEM_CONFIG_PATH) or {}
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns to translate")
+    parser.add_argument("--src", required=True, type=resolve_language, help="Source language code or name")
+    parser.add_argument("--dst", required=True, type=resolve_language, help="Target language code or name")
+    parser.add_argument("--model", required=True, help="Ollama model name, or the config/api_config name of an online model")
+    parser.add_argument("--online", action="store_true", help="Use an online model")
+    parser.add_argument("--api-key", default=os.environ.get("LINGUAHARU_API_KEY", ""), help="API key for online models (default: $LINGUAHARU_API_KEY)")
+    parser.add_argument("--output", default="translated", help="Directory the translated tree is written to")
+    parser.add_argument("--parallel", type=int, default=config.get("max_parallel_files", 2), help="Files translated at the same time")
+    parser.add_argument("--max-token", type=int, default=config.get("max_token", 768), help="Token budget per request")
+    parser.add_argument("--max-retries", type=int, default=config.get("max_retries", 4), help="Attempts per failed entry")
+    parser.add_argument("--resume", action="store_true", default=config.get("resume_jobs", False), help="Reuse the results of interrupted runs of the same jobs")
+    parser.add_argument("--fresh", dest="resume", action="store_false", help="Start every job from scratch")
+    parser.add_argument("--translation-memory", action="store_true", default=config.get("translation_memory", False), help="Reuse and store translations in the local translation memory shared by all jobs")
+    args = parser.parse_args()
+
+    if args.online and not args.api_key:
+        parser.error("An API key is required for online models (--api-key or $LINGUAHARU_API_KEY).")
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("No supported files found.")
+        return 1
+
+    print(f"Translating {len(files)} files with {args.model} ({args.src} -> {args.dst}), {args.parallel} at a time")
+    stats = {"segments": 0, "tokens": 0}
+    stats_lock = threading.Lock()
+    failed_files = []
+    start = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as executor:
+            futures = {
+                executor.submit(translate_file, path, rel_path, args, config, stats, stats_lock): rel_path
+                for path, rel_path in files
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                rel_path = futures[future]
+                try:
+                    target_path, missing_counts = future.result()
+                except Exception as e:
+                    app_logger.exception(f"Error processing file {rel_path}: {e}")
+                    failed_files.append(rel_path)
+                    print(f"[{done}/{len(files)}] FAILED {rel_path}: {e}")
+                    continue
+                note = f" ({len(missing_counts)} entries missing)" if missing_counts else ""
+                print(f"[{done}/{len(files)}] {rel_path} -> {target_path}{note}")
+    finally:
+        # Close the pooled keep-alive connections to the model servers
+        close_all()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    translated = len(files) - len(failed_files)
+    print(
+        f"Done in {elapsed:.1f}s: {translated} translated, {len(failed_files)} failed | "
+        f"{translated / elapsed:.3f} files/s, {stats['segments'] / elapsed:.2f} segments/s, "
+        f"{stats['tokens'] / elapsed:.1f} tokens/s"
+    )
+    return 1 if failed_files else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,7 +28,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Status Message",
         "Translate": "Translate",
         "Local Network Mode (Restart to Apply)": "Local Network Mode (Restart to Apply)",
-        "Max Retries": "Max Retries"
+        "Max Retries": "Max Retries",
+        "Resume Unfinished Jobs": "Resume Unfinished Jobs"
     },
     # Simplified Chinese
     "zh": {
@@ -43,7 +44,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "状态消息",
         "Translate": "翻译",
         "Local Network Mode (Restart to Apply)": "局域网模式（重启后生效）",
-        "Max Retries": "最大重试次数"
+        "Max Retries": "最大重试次数",
+        "Resume Unfinished Jobs": "继续未完成的任务"
     },
     # Traditional Chinese
     "zh-Hant": {
@@ -58,7 +60,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "狀態訊息",
         "Translate": "翻譯",
         "Local Network Mode (Restart to Apply)": "區域網路模式（重新啟動後生效）",
-        "Max Retries": "最大重試次數"
+        "Max Retries": "最大重試次數",
+        "Resume Unfinished Jobs": "繼續未完成的任務"
     },
     # Japanese
     "ja": {
@@ -73,7 +76,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "ステータスメッセージ",
         "Translate": "翻訳",
         "Local Network Mode (Restart to Apply)": "ローカルネットワークモード（再起動後に適用）",
-        "Max Retries": "最大再試行回数"
+        "Max Retries": "最大再試行回数",
+        "Resume Unfinished Jobs": "未完了のジョブを再開"
     },
     # Spanish
     "es": {
@@ -88,7 +92,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Mensaje de estado",
         "Translate": "Traducir",
         "Local Network Mode (Restart to Apply)": "Modo de red local (Reiniciar para aplicar)",
-        "Max Retries": "Número máximo de reintentos"
+        "Max Retries": "Número máximo de reintentos",
+        "Resume Unfinished Jobs": "Reanudar trabajos sin terminar"
     },
     # French
     "fr": {
@@ -103,7 +108,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Message d'état",
         "Translate": "Traduire",
         "Local Network Mode (Restart to Apply)": "Mode réseau local (Redémarrer pour appliquer)",
-        "Max Retries": "Nombre maximal de tentatives"
+        "Max Retries": "Nombre maximal de tentatives",
+        "Resume Unfinished Jobs": "Reprendre les tâches inachevées"
     },
     # German
     "de": {
@@ -118,7 +124,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Statusnachricht",
         "Translate": "Übersetzen",
         "Local Network Mode (Restart to Apply)": "Lokaler Netzwerkmodus (Neustart erforderlich)",
-        "Max Retries": "Maximale Wiederholungsversuche"
+        "Max Retries": "Maximale Wiederholungsversuche",
+        "Resume Unfinished Jobs": "Unvollendete Aufträge fortsetzen"
     },
     # Italian
     "it": {
@@ -133,7 +140,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Messaggio di stato",
         "Translate": "Traduci",
         "Local Network Mode (Restart to Apply)": "Modalità rete locale (Riavvia per applicare)",
-        "Max Retries": "Numero massimo di tentativi"
+        "Max Retries": "Numero massimo di tentativi",
+        "Resume Unfinished Jobs": "Riprendi i lavori non completati"
     },
     # Portuguese
     "pt": {
@@ -148,7 +156,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Mensagem de status",
         "Translate": "Traduzir",
         "Local Network Mode (Restart to Apply)": "Modo de rede local (Reiniciar para aplicar)",
-        "Max Retries": "Número máximo de tentativas"
+        "Max Retries": "Número máximo de tentativas",
+        "Resume Unfinished Jobs": "Retomar trabalhos inacabados"
     },
     # Russian
     "ru": {
@@ -163,7 +172,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Статусное сообщение",
         "Translate": "Перевести",
         "Local Network Mode (Restart to Apply)": "Режим локальной сети (Перезагрузка для применения)",
-        "Max Retries": "Максимальное количество повторных попыток"
+        "Max Retries": "Максимальное количество повторных попыток",
+        "Resume Unfinished Jobs": "Продолжить незавершённые задания"
     },
     # Korean
     "ko": {
@@ -178,7 +188,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "상태 메시지",
         "Translate": "번역",
         "Local Network Mode (Restart to Apply)": "로컬 네트워크 모드 (적용하려면 재시작)",
-        "Max Retries": "최대 재시도 횟수"
+        "Max Retries": "최대 재시도 횟수",
+        "Resume Unfinished Jobs": "미완료 작업 재개"
     },
     # Thai
     "th": {
@@ -193,7 +204,8 @@ LABEL_TRANSLATIONS = {
         "Status Message": "ข้อความสถานะ",
         "Translate": "แปล",
         "Local Network Mode (Restart to Apply)": "โหมดเครือข่ายท้องถิ่น (รีสตาร์ทเพื่อใช้งาน)",
-        "Max Retries": "จำนวนการลองซ้ำสูงสุด"
+        "Max Retries": "จำนวนการลองซ้ำสูงสุด",
+        "Resume Unfinished Jobs": "ทำงานที่ยังไม่เสร็จต่อ"
     },
     # Vietnamese
     "vi": {
@@ -208,6 +220,7 @@ LABEL_TRANSLATIONS = {
         "Status Message": "Thông báo trạng thái",
         "Translate": "Dịch",
         "Local Network Mode (Restart to Apply)": "Chế độ mạng cục bộ (Khởi động lại để áp dụng)",
-        "Max Retries": "Số lần thử lại tối đa"
+        "Max Retries": "Số lần thử lại tối đa",
+        "Resume Unfinished Jobs": "Tiếp tục công việc chưa hoàn thành"
     }
 }
\ No newline at end of file
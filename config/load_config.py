@@ -0,0 +1,34 @@
+import json
+import os
+import threading
+from config.log_config import app_logger
+
+_lock = threading.Lock()
+_config_cache = {}  # path -> (mtime, config)
+
+
+def load_json_config(json_path):
+    """
+    Load a JSON config file, parsing it again only when its mtime changes.
+    Returns None if the file is missing or invalid.
+    """
+    try:
+        mtime = os.path.getmtime(json_path)
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _config_cache.get(json_path)
+        if cached and cached[0] == mtime:
+            return dict(cached[1])
+
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except json.JSONDecodeError:
+        app_logger.error(f"Failed to parse JSON file: {json_path}")
+        return None
+
+    with _lock:
+        _config_cache[json_path] = (mtime, config)
+    return dict(config)
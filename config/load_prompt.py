@@ -17,4 +17,16 @@ def load_prompt(src_lang,dst_lang):
         # Replace placeholders with src_lang and dst_lang
         system_prompt = system_prompt.format(Text_Target_Language=dst_lang, Text_Source_Language=src_lang)
         
-        return system_prompt, user_prompt, previous_prompt, previous_text_default
\ No newline at end of file
+        return system_prompt, user_prompt, previous_prompt, previous_text_default
+
+def load_source_context_prompt(dst_lang):
+    """Load the prompt that introduces preceding source lines as context (not as an output example)."""
+    prompt_path = f"config/prompts/{dst_lang}.json"
+
+    with open(prompt_path, "r", encoding="utf-8") as file:
+        prompt_data = json.load(file)
+
+    return prompt_data.get(
+        "source_context_prompt",
+        "These are the source lines that come right before the text to translate. They are context only: do not translate them or include them in the output.",
+    )
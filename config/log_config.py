@@ -21,12 +21,18 @@ class SimpleColoredFormatter(logging.Formatter):
         msg = super().format(record)
         return f"{log_color}[{levelname}] {msg}{Style.RESET_ALL}"
 
+LOG_FILE_ENV = "LINGUAHARU_LOG_FILE"
+
 def setup_logger(name="app_logger", console_level=logging.INFO, file_level=logging.DEBUG):
     log_dir = "log"
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
-    current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    log_file = os.path.join(log_dir, f"{current_time}_app.log")
+    # Worker processes (PDF page workers) append to the log file of the process that started them
+    log_file = os.environ.get(LOG_FILE_ENV)
+    if not log_file:
+        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        log_file = os.path.abspath(os.path.join(log_dir, f"{current_time}_app.log"))
+        os.environ[LOG_FILE_ENV] = log_file
 
     logger = logging.getLogger(name)
     # Set the logger to the lowest level of either console or file level
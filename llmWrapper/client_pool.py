@@ -0,0 +1,75 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from openai import OpenAI, DefaultHttpxClient
+import httpx
+from config.log_config import app_logger
+
+DEFAULT_ONLINE_CONCURRENCY = 4
+DEFAULT_OFFLINE_CONCURRENCY = 1
+
+_lock = threading.Lock()
+_openai_clients = {}    # (base_url, api_key, pool_size) -> OpenAI
+_http_sessions = {}     # (name, pool_size, hosts) -> requests.Session
+
+
+def parse_concurrency(value, default):
+    """Turn a configured in-flight limit into a positive int, falling back to default."""
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        app_logger.warning(f"Invalid concurrency value '{value}', using {default}")
+        return default
+
+
+def get_openai_client(base_url, api_key, pool_size=DEFAULT_ONLINE_CONCURRENCY):
+    """
+    Return a shared OpenAI client for this endpoint and key.
+    The underlying httpx pool keeps pool_size keep-alive connections, so
+    concurrent segments reuse TLS sessions instead of reconnecting.
+    Retries are left to translate_online, which paces them per provider.
+    """
+    key = (base_url, api_key, pool_size)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            app_logger.debug(f"Creating API client for {base_url} (pool size {pool_size})")
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                ),
+            )
+            _openai_clients[key] = client
+        return client
+
+
+def get_http_session(name, pool_size=DEFAULT_OFFLINE_CONCURRENCY, hosts=1):
+    """
+    Return a shared keep-alive requests.Session sized for pool_size parallel requests
+    to each of hosts servers, so switching between servers keeps their connections open.
+    """
+    hosts = max(1, hosts)
+    key = (name, pool_size, hosts)
+    with _lock:
+        session = _http_sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_sessions[key] = session
+        return session
+
+
+def close_all():
+    """Close every pooled client."""
+    with _lock:
+        for client in _openai_clients.values():
+            client.close()
+        for session in _http_sessions.values():
+            session.close()
+        _openai_clients.clear()
+        _http_sessions.clear()
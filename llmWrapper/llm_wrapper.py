@@ -1,25 +1,68 @@
 from config.log_config import app_logger
-from llmWrapper.online_translation import translate_online
-from llmWrapper.offline_translation import translate_offline
+from llmWrapper.online_translation import translate_online, load_model_config
+from llmWrapper.offline_translation import translate_offline, preload_offline_model, get_offline_concurrency
+from config.load_config import load_json_config
+from llmWrapper.client_pool import parse_concurrency, DEFAULT_ONLINE_CONCURRENCY
+import os
 
+SYSTEM_CONFIG_PATH = os.path.join("config", "system_config.json")
 
-def translate_text(segments, previous_text, model, use_online, api_key, system_prompt, user_prompt, previous_prompt):
-    """Translate text segments"""
+
+def translate_text(segments, previous_text, model, use_online, api_key, system_prompt, user_prompt, previous_prompt, expected_keys=None, source_context=None, source_context_prompt=None):
+    """
+    Translate text segments.
+    expected_keys are the segment's keys; a streamed Ollama response stops once they are all out.
+    source_context holds preceding source lines, sent under source_context_prompt after the
+    previous_text format example.
+    """
     
     # Join segments to create the full text to translate
     text_to_translate = segments
     
+    context = f"{previous_prompt}\n###{previous_text}###\n"
+    if source_context:
+        context += f"{source_context_prompt}\n###{source_context}###\n"
+
     messages = [
         {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"{previous_prompt}\n###{previous_text}###\n{user_prompt}###\n{text_to_translate}"},
+        {"role": "user", "content": f"{context}{user_prompt}###\n{text_to_translate}"},
     ]
     
     app_logger.debug(f"API messages: {messages}")
     
     if not use_online:
-        return translate_offline(messages, model)
+        return translate_offline(messages, model, expected_keys)
     else:
         return translate_online(api_key, messages, model)
 
+def prepare_model(model, use_online, max_token):
+    """Get the model ready for a job: local Ollama models are loaded in the background."""
+    if not use_online:
+        preload_offline_model(model, max_token)
+
+def get_max_concurrency(model, use_online):
+    """
+    Return how many segments may be in flight at once for the given model.
+    Online models read "max_concurrency" from their config/api_config JSON,
+    Ollama allows OLLAMA_NUM_PARALLEL per endpoint (one request at a time by default).
+    """
+    if use_online:
+        model_config = load_model_config(model) or {}
+        return parse_concurrency(model_config.get("max_concurrency", DEFAULT_ONLINE_CONCURRENCY), DEFAULT_ONLINE_CONCURRENCY)
+    return get_offline_concurrency()
+
+def get_wire_format(model, use_online, default="json"):
+    """
+    Return the segment wire format for the given model.
+    Online models may set "wire_format" in their config/api_config JSON; Ollama models may be
+    listed in the "offline_wire_formats" of system_config.json, by full name ("qwen2.5:7b")
+    or without the tag ("qwen2.5"). Everything else uses default.
+    """
+    if use_online:
+        model_config = load_model_config(model) or {}
+        return model_config.get("wire_format") or default
+    wire_formats = (load_json_config(SYSTEM_CONFIG_PATH) or {}).get("offline_wire_formats") or {}
+    return wire_formats.get(model) or wire_formats.get(model.split(":")[0]) or default
+
 if __name__=="__main__":
-    pass
\ No newline at end of file
+    pass
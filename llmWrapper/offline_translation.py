@@ -5,13 +5,15 @@ from config.log_config import app_logger
 import subprocess
 import json
 import socket
+import math
+import threading
+import time
+from llmWrapper.client_pool import get_http_session, parse_concurrency, DEFAULT_OFFLINE_CONCURRENCY
+from textProcessing.tokenizer import count_tokens
 
-def _get_host():
-    # Get OLLAMA_HOST from environment variables or use default
-    ollama_host = os.environ.get("OLLAMA_HOST", "localhost:11434")
-    app_logger.info(f"Ollama running in {ollama_host}")
-
-    # Parse host and port from OLLAMA_HOST
+def _get_host(ollama_host):
+    # Parse host and port from an OLLAMA_HOST style address
+    ollama_host = re.sub(r"^https?://", "", ollama_host.strip()).rstrip("/")
     if ":" in ollama_host:
         host_part, port_part = ollama_host.rsplit(":", 1)
     else:
@@ -24,23 +26,417 @@ def _get_host():
     
     return host_part, port_part
 
-OLLAMA_HOST, OLLAMA_PORT = _get_host()
+class OllamaEndpoint:
+    """One Ollama server, with the state used for routing requests to it."""
+
+    def __init__(self, host, port, weight=1.0):
+        self.host = host
+        self.port = port
+        self.weight = weight
+        self.outstanding = 0      # Requests currently sent to this endpoint
+        self.failures = 0         # Consecutive failed requests
+        self.ejected_until = 0.0  # Monotonic time until which the endpoint gets no requests
+        self.probing = False      # A thread is checking whether the ejected endpoint is back
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def __repr__(self):
+        return f"{self.host}:{self.port}"
+
+def _get_endpoints():
+    """
+    Read the Ollama endpoints from OLLAMA_HOSTS, a comma-separated list of
+    "host:port" entries with an optional "*weight" (e.g. "box1:11434*2,box2:11434"),
+    falling back to OLLAMA_HOST or the default local server.
+    """
+    ollama_hosts = os.environ.get("OLLAMA_HOSTS") or os.environ.get("OLLAMA_HOST", "localhost:11434")
+    endpoints = []
+    for entry in ollama_hosts.split(","):
+        if not entry.strip():
+            continue
+        address, _, weight = entry.partition("*")
+        try:
+            weight = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            app_logger.warning(f"Invalid weight in '{entry}', using 1")
+            weight = 1.0
+        endpoints.append(OllamaEndpoint(*_get_host(address), max(weight, 0.01)))
+    if not endpoints:
+        endpoints.append(OllamaEndpoint(*_get_host("localhost:11434")))
+    app_logger.info(f"Ollama running in {', '.join(map(str, endpoints))}")
+    return endpoints
+
+OLLAMA_ENDPOINTS = _get_endpoints()
+
+# An endpoint failing EJECT_AFTER_FAILURES requests in a row gets no requests for EJECT_SECONDS,
+# and is only taken back once is_ollama_running can reach it again
+EJECT_AFTER_FAILURES = 2
+EJECT_SECONDS = 30
+
+_endpoint_lock = threading.Lock()
+
+def _needs_probe(endpoint, now):
+    """An ejected endpoint whose time is up, and that no other thread is probing already."""
+    return endpoint.ejected_until and endpoint.ejected_until <= now and not endpoint.probing
+
+def _readmit_endpoints(endpoints):
+    """
+    Probe ejected endpoints whose ejection time is up and take back the reachable ones.
+    Runs outside _endpoint_lock, so routing to the other endpoints does not wait for the probe.
+    """
+    for endpoint in endpoints:
+        reachable = is_ollama_running(endpoint=endpoint)
+        with _endpoint_lock:
+            endpoint.probing = False
+            if reachable:
+                app_logger.info(f"Ollama endpoint {endpoint} is reachable again.")
+                endpoint.ejected_until = 0.0
+                endpoint.failures = 0
+            else:
+                endpoint.ejected_until = time.monotonic() + EJECT_SECONDS
+
+def _acquire_endpoint(exclude=()):
+    """
+    Pick the endpoint for the next request: the available one with the fewest outstanding
+    requests relative to its weight. If every endpoint is ejected, the one that comes back
+    first is used anyway.
+    """
+    candidates = [endpoint for endpoint in OLLAMA_ENDPOINTS if endpoint not in exclude] or OLLAMA_ENDPOINTS
+    with _endpoint_lock:
+        now = time.monotonic()
+        to_probe = [endpoint for endpoint in candidates if _needs_probe(endpoint, now)]
+        for endpoint in to_probe:
+            endpoint.probing = True
+    if to_probe:
+        _readmit_endpoints(to_probe)
+    with _endpoint_lock:
+        available = [endpoint for endpoint in candidates if not endpoint.ejected_until]
+        if available:
+            endpoint = min(available, key=lambda e: (e.outstanding + 1) / e.weight)
+        else:
+            endpoint = min(candidates, key=lambda e: e.ejected_until)
+        endpoint.outstanding += 1
+        return endpoint
+
+def _release_endpoint(endpoint, failed=False):
+    with _endpoint_lock:
+        endpoint.outstanding -= 1
+        if not failed:
+            endpoint.failures = 0
+            return
+        endpoint.failures += 1
+        if endpoint.failures >= EJECT_AFTER_FAILURES and not endpoint.ejected_until:
+            endpoint.ejected_until = time.monotonic() + EJECT_SECONDS
+            app_logger.warning(f"Ollama endpoint {endpoint} failed {endpoint.failures} requests in a row, ejecting it for {EJECT_SECONDS}s.")
+
+def get_offline_concurrency():
+    """OLLAMA_NUM_PARALLEL requests for each endpoint."""
+    per_endpoint = parse_concurrency(os.environ.get("OLLAMA_NUM_PARALLEL", DEFAULT_OFFLINE_CONCURRENCY), DEFAULT_OFFLINE_CONCURRENCY)
+    return per_endpoint * len(OLLAMA_ENDPOINTS)
+
+# Streaming responses are read chunk by chunk and can be cut short; set OLLAMA_STREAM=0 to wait for full completions
+OLLAMA_STREAM = os.environ.get("OLLAMA_STREAM", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Visible output may use OUTPUT_BUDGET_RATIO times the tokens of the request, and at least OUTPUT_BUDGET_MIN
+OUTPUT_BUDGET_RATIO = 2
+OUTPUT_BUDGET_MIN = 256
+
+# Output whose last REPEAT_SPAN characters repeat with a period of at most REPEAT_MAX_PERIOD is a runaway loop
+REPEAT_SPAN = 320
+REPEAT_MAX_PERIOD = 120
+
+# Once every expected key is out, read at most EARLY_STOP_GRACE more chunks for the closing brace
+EARLY_STOP_GRACE = 8
+
+# How long Ollama keeps a model loaded after a request, so it stays in memory for the whole job
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# num_ctx covers the request plus its output budget with some headroom for tokenizer
+# differences, rounded up to NUM_CTX_STEP so small changes don't reload the model
+NUM_CTX_MARGIN = 1.25
+NUM_CTX_STEP = 2048
+NUM_CTX_MIN = 2048
+
+_model_lock = threading.Lock()
+_model_context_lengths = {}  # model -> context length reported by /api/show
+_model_num_ctx = {}          # model -> num_ctx in use, only ever grows
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# Complete "key": "value" pairs and terminated "key: value" lines
+_EMITTED_KEY_PATTERNS = (
+    re.compile(r'"(\d+)"\s*:\s*"(?:[^"\\\n]|\\.)*"'),
+    re.compile(r"^\s*(\d+)\s*[:：][^\n]*\n", re.MULTILINE),
+)
+
+class _ThinkFilter:
+    """Drop <think> sections from streamed content as they arrive, without buffering them."""
+
+    def __init__(self):
+        self.in_think = False
+        self.pending = ""
+
+    def feed(self, text):
+        text = self.pending + text
+        self.pending = ""
+        visible = []
+        while text:
+            tag = THINK_CLOSE if self.in_think else THINK_OPEN
+            position = text.find(tag)
+            if position >= 0:
+                if not self.in_think:
+                    visible.append(text[:position])
+                text = text[position + len(tag):]
+                self.in_think = not self.in_think
+                continue
+            # Hold back a trailing partial tag until the next chunk
+            keep = next((n for n in range(len(tag) - 1, 0, -1) if text.endswith(tag[:n])), 0)
+            if not self.in_think:
+                visible.append(text[:len(text) - keep])
+            self.pending = text[len(text) - keep:] if keep else ""
+            break
+        return "".join(visible)
+
+    def flush(self):
+        text, self.pending = self.pending, ""
+        return "" if self.in_think else text
 
-def translate_offline(messages, model):
+def _is_repeating(text):
+    tail = text[-REPEAT_SPAN:]
+    if len(tail) < REPEAT_SPAN:
+        return False
+    return any(tail[period:] == tail[:-period] for period in range(1, REPEAT_MAX_PERIOD + 1))
+
+class _EmittedKeyTracker:
+    """
+    Track the keys a streamed response has emitted, scanning each chunk once instead of
+    the whole output. An entry spans at most one line break, so only the last complete
+    line and the current one are kept for matching entries that continue in the next chunk.
+    """
+
+    def __init__(self, expected_keys):
+        self.expected_keys = expected_keys
+        self.emitted = set()
+        self.window = ""       # Tail of the output that is scanned
+        self.window_start = 0  # Offset of the window in the whole output
+        self.end = 0           # Offset where the last complete entry ends
+
+    def feed(self, text):
+        """Add a chunk; return where the last complete entry ends once every expected key is out, else None."""
+        last_break = self.window.rfind("\n")
+        if last_break >= 0:
+            cut = self.window.rfind("\n", 0, last_break) + 1
+            self.window = self.window[cut:]
+            self.window_start += cut
+        self.window += text
+        for pattern in _EMITTED_KEY_PATTERNS:
+            for match in pattern.finditer(self.window):
+                self.emitted.add(match.group(1))
+                self.end = max(self.end, self.window_start + match.end())
+        return self.end if self.expected_keys <= self.emitted else None
+
+    def find(self, sub, start):
+        """Offset in the whole output of sub after start, looking only at the current window, or -1."""
+        position = self.window.find(sub, max(0, start - self.window_start))
+        return self.window_start + position if position >= 0 else -1
+
+def _get_output_budget(messages):
+    input_tokens = count_tokens(messages[-1]["content"]) if messages else 0
+    return max(OUTPUT_BUDGET_MIN, OUTPUT_BUDGET_RATIO * input_tokens)
+
+def _read_stream(response, messages, expected_keys=None):
+    """
+    Collect the visible content of a streamed /api/chat response.
+    Reading stops once every expected key has been emitted (and the closing brace, if
+    any, has followed), when the output starts repeating itself or when it exceeds
+    the output budget; closing the response makes Ollama stop generating.
+    """
+    expected_keys = {str(key) for key in expected_keys or ()}
+    output_budget = _get_output_budget(messages)
+    think_filter = _ThinkFilter()
+    key_tracker = _EmittedKeyTracker(expected_keys)
+    visible_parts = []
+    visible_tail = ""
+    think_tail = ""
+    output_tokens = 0
+    stop_at = None
+    entries_end = 0
+    closing = -1
+
+    try:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"])
+
+            content = chunk.get("message", {}).get("content", "")
+            if content:
+                visible = think_filter.feed(content)
+                if visible:
+                    output_tokens += 1
+                    visible_parts.append(visible)
+                    if expected_keys:
+                        end = key_tracker.feed(visible)
+                        if stop_at is None and end is not None:
+                            entries_end = end
+                            stop_at = output_tokens + EARLY_STOP_GRACE
+                    if stop_at is not None:
+                        closing = key_tracker.find("}", entries_end)
+                        if closing >= 0 or output_tokens >= stop_at:
+                            app_logger.debug("All expected keys emitted, stopping generation.")
+                            break
+                        continue
+                    if output_tokens > output_budget:
+                        app_logger.warning(f"Output exceeded {output_budget} tokens, stopping generation.")
+                        break
+                    visible_tail = (visible_tail + visible)[-REPEAT_SPAN:]
+                    if _is_repeating(visible_tail):
+                        app_logger.warning("Repeated output detected, stopping generation.")
+                        break
+                elif think_filter.in_think:
+                    think_tail = (think_tail + content)[-REPEAT_SPAN:]
+                    if _is_repeating(think_tail):
+                        app_logger.warning("Repeated reasoning detected, stopping generation.")
+                        break
+
+            if chunk.get("done"):
+                visible_parts.append(think_filter.flush())
+                break
+    finally:
+        response.close()
+
+    visible_text = "".join(visible_parts)
+    if closing >= 0:
+        # Drop whatever part of a closing fence came with the brace
+        visible_text = visible_text[:closing + 1]
+    return visible_text.strip()
+
+def _get_session():
+    pool_size = parse_concurrency(os.environ.get("OLLAMA_NUM_PARALLEL", DEFAULT_OFFLINE_CONCURRENCY), DEFAULT_OFFLINE_CONCURRENCY)
+    return get_http_session("ollama", pool_size, hosts=len(OLLAMA_ENDPOINTS))
+
+def get_model_context_length(model):
+    """Return the model's maximum context length from /api/show, or None if it is unknown."""
+    with _model_lock:
+        if model in _model_context_lengths:
+            return _model_context_lengths[model]
+
+    endpoint = _acquire_endpoint()
+    try:
+        response = _get_session().post(f"{endpoint.url}/api/show", json={"model": model}, timeout=10)
+        response.raise_for_status()
+        model_info = response.json().get("model_info", {})
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # Only an unreachable endpoint counts against it; an error status says nothing about /api/chat
+        _release_endpoint(endpoint, failed=isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)))
+        app_logger.warning(f"Could not read model info for {model}: {e}")
+        # Remember the failure too, so later requests do not wait on /api/show again
+        with _model_lock:
+            _model_context_lengths[model] = None
+        return None
+    _release_endpoint(endpoint)
+
+    architecture = model_info.get("general.architecture")
+    context_length = model_info.get(f"{architecture}.context_length")
+    if context_length is None:
+        context_length = next((value for key, value in model_info.items() if key.endswith(".context_length")), None)
+    with _model_lock:
+        _model_context_lengths[model] = context_length
+    return context_length
+
+def get_num_ctx(model, prompt_tokens):
+    """
+    Size num_ctx for a request of prompt_tokens plus its output budget, capped at the
+    model's context length. The value per model never shrinks, so Ollama does not
+    reload the model for every smaller request.
+    """
+    needed = (prompt_tokens + max(OUTPUT_BUDGET_MIN, OUTPUT_BUDGET_RATIO * prompt_tokens)) * NUM_CTX_MARGIN
+    num_ctx = max(NUM_CTX_MIN, math.ceil(needed / NUM_CTX_STEP) * NUM_CTX_STEP)
+    context_length = get_model_context_length(model)
+    if context_length:
+        num_ctx = min(num_ctx, context_length)
+
+    with _model_lock:
+        num_ctx = max(num_ctx, _model_num_ctx.get(model, 0))
+        _model_num_ctx[model] = num_ctx
+    return num_ctx
+
+def preload_offline_model(model, max_token):
+    """
+    Load the model on every endpoint in the background when a job starts, with the
+    num_ctx its segments of max_token will use and the job's keep_alive, so the first
+    segment does not wait for the model to load. Unreachable endpoints are ejected.
+    """
+    def preload(endpoint):
+        if not is_ollama_running(endpoint=endpoint):
+            with _endpoint_lock:
+                endpoint.ejected_until = time.monotonic() + EJECT_SECONDS
+            app_logger.warning(f"Ollama endpoint {endpoint} is not reachable, ejecting it for {EJECT_SECONDS}s.")
+            return
+        num_ctx = get_num_ctx(model, max_token)
+        try:
+            response = _get_session().post(
+                f"{endpoint.url}/api/generate",
+                json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE, "options": {"num_ctx": num_ctx}},
+            )
+            response.raise_for_status()
+            app_logger.info(f"Loaded {model} on {endpoint} with num_ctx {num_ctx}")
+        except requests.exceptions.RequestException as e:
+            app_logger.warning(f"Could not preload {model} on {endpoint}: {e}")
+
+    for endpoint in OLLAMA_ENDPOINTS:
+        threading.Thread(target=preload, args=(endpoint,), daemon=True).start()
+
+def translate_offline(messages, model, expected_keys=None):
+    """
+    Send the request to the least busy Ollama endpoint. If the endpoint cannot be
+    reached or answers with an HTTP error, the request moves on to the next one.
+    """
+    tried = []
+    while True:
+        endpoint = _acquire_endpoint(exclude=tried)
+        tried.append(endpoint)
+        try:
+            result = _chat(endpoint, messages, model, expected_keys)
+        except requests.exceptions.RequestException as e:
+            _release_endpoint(endpoint, failed=True)
+            if len(tried) < len(OLLAMA_ENDPOINTS):
+                app_logger.warning(f"Request to Ollama endpoint {endpoint} failed: {e}. Trying another endpoint.")
+                continue
+            app_logger.error(f"Error during API request: {e}")
+            return f"An error occurred during API request: {str(e)}"
+        _release_endpoint(endpoint)
+        return result
+
+def _chat(endpoint, messages, model, expected_keys=None):
     try:
-        url = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}/api/chat"
+        url = f"{endpoint.url}/api/chat"
         
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
         payload = {
             "model": model,
             "messages": messages,
             "options": {
-                "num_ctx": 8192,
+                "num_ctx": get_num_ctx(model, prompt_tokens),
                 "num_predict": -1
             },
-            "stream": False
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "stream": OLLAMA_STREAM
         }
-        response = requests.post(url, json=payload)
+        response = _get_session().post(url, json=payload, stream=OLLAMA_STREAM)
         response.raise_for_status()  # Raise exception for HTTP errors     
+        if OLLAMA_STREAM:
+            translated_text = _read_stream(response, messages, expected_keys)
+            if not translated_text:
+                app_logger.warning(f"Empty response from ollama")
+                return None
+            app_logger.debug(f"API Response: {translated_text}")
+            return translated_text
         response = response.text
         # Extract the translated content
         try:
@@ -57,21 +453,25 @@ def translate_offline(messages, model):
             app_logger.error(f"Response parsing failed: {e}")
             return "Error parsing API response."
 
-    except requests.exceptions.RequestException as e:
-        app_logger.error(f"Error during API request: {e}")
-        return f"An error occurred during API request: {str(e)}"
+    except requests.exceptions.RequestException:
+        raise
     except Exception as e:
         app_logger.error(f"Unexpected error during API call: {e}")
         return f"An unexpected error occurred: {str(e)}"
 
-def is_ollama_running(timeout=1):
-    """Check if Ollama service is running by attempting to connect to its API port."""
+def is_ollama_running(timeout=1, endpoint=None):
+    """
+    Check if Ollama service is running by attempting to connect to its API port.
+    Without an endpoint, any reachable endpoint counts.
+    """
+    if endpoint is None:
+        return any(is_ollama_running(timeout, endpoint) for endpoint in OLLAMA_ENDPOINTS)
     try:
-        port_int = int(OLLAMA_PORT)
+        port_int = int(endpoint.port)
         
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
-        result = sock.connect_ex((OLLAMA_HOST, port_int))
+        result = sock.connect_ex((endpoint.host, port_int))
         sock.close()
         return result == 0
     except Exception as e:
@@ -1,9 +1,13 @@
 import re
 import logging
-import json
 import os
-from openai import OpenAI
+import time
+from openai import APIConnectionError, APIStatusError
 from config.log_config import app_logger
+from config.load_config import load_json_config
+from llmWrapper.client_pool import get_openai_client, parse_concurrency, DEFAULT_ONLINE_CONCURRENCY
+from llmWrapper.rate_limiter import get_rate_limiter, get_retry_after, get_backoff, MAX_RATE_LIMIT_RETRIES
+from textProcessing.tokenizer import count_tokens, get_model_encoding
 
 CONFIG_DIR = "config/api_config"
 
@@ -11,23 +15,26 @@ CONFIG_DIR = "config/api_config"
 def load_model_config(model):
     """
     Load the JSON config for the given model name.
+    The parsed config is cached and only re-read when the file changes.
     """
     json_path = os.path.join(CONFIG_DIR, f"{model}.json")
     if not os.path.exists(json_path):
         app_logger.error(f"Model config file not found: {json_path}")
         return None
 
-    try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
-        return config
-    except json.JSONDecodeError:
-        app_logger.error(f"Failed to parse JSON file: {json_path}")
-        return None
+    return load_json_config(json_path)
+
+def _is_retryable(error):
+    """Rate limits (429), server errors (5xx) and connection problems are worth another try."""
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
     
 def translate_online(api_key, messages, model):
     """
     Perform translation using an online API with config from a JSON file.
+    Requests are paced by the provider's rate limiter, and rate-limited or failing
+    requests are retried with backoff before the call gives up.
     :param api_key: API key.
     :param messages: List of chat messages.
     :param model: Selected model (same as JSON filename).
@@ -35,6 +42,8 @@ def translate_online(api_key, messages, model):
     """
     # Load model config
     model_config = load_model_config(model)
+    if not model_config:
+        return "Invalid model configuration."
     # Get API settings from the config
     base_url = model_config.get("base_url")
     api_model = model_config.get("model")
@@ -48,8 +57,9 @@ def translate_online(api_key, messages, model):
         return "Invalid model configuration."
 
     try:
-        # Initialize API client
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        # Reuse the pooled API client for this endpoint
+        pool_size = parse_concurrency(model_config.get("max_concurrency", DEFAULT_ONLINE_CONCURRENCY), DEFAULT_ONLINE_CONCURRENCY)
+        client = get_openai_client(base_url, api_key, pool_size)
 
         # Prepare parameters for the API call
         params = {
@@ -68,12 +78,38 @@ def translate_online(api_key, messages, model):
         if frequency_penalty is not None:
             params["frequency_penalty"] = frequency_penalty
 
-        # Send request
-        response = client.chat.completions.create(**params)
     except Exception as e:
         app_logger.error(f"API call failed: {e}")
         return "API request failed."
 
+    # Limits from "rpm", "tpm" and "max_concurrency" in the model config, shared by every job using this provider.
+    # The request is budgeted as its prompt plus as many tokens again for the answer
+    limiter = get_rate_limiter(base_url, model_config.get("rpm"), model_config.get("tpm"), pool_size)
+    encoding_name = get_model_encoding(model)
+    estimated_tokens = 2 * sum(count_tokens(message["content"], encoding_name) for message in messages)
+
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        limiter.acquire(estimated_tokens)
+        used_tokens = None
+        try:
+            # Send request
+            response = client.chat.completions.create(**params)
+            used_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+            break
+        except Exception as e:
+            if not _is_retryable(e) or attempt == MAX_RATE_LIMIT_RETRIES:
+                app_logger.error(f"API call failed: {e}")
+                return "API request failed."
+            retry_after = get_retry_after(getattr(getattr(e, "response", None), "headers", None))
+            delay = retry_after if retry_after is not None else get_backoff(attempt)
+            if getattr(e, "status_code", None) == 429:
+                # Hold back the other requests to this provider as well
+                limiter.pause(delay)
+            app_logger.warning(f"API call failed: {e}. Retrying in {delay:.1f}s ({attempt + 1}/{MAX_RATE_LIMIT_RETRIES})")
+        finally:
+            limiter.release(estimated_tokens, used_tokens)
+        time.sleep(delay)
+
     try:
         if response:
             app_logger.debug(f"API Response: {response}")
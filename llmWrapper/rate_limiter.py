@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from config.log_config import app_logger
+
+# Retries of a rate-limited (429) or failing (5xx) request, with jittered exponential backoff
+MAX_RATE_LIMIT_RETRIES = 6
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+_lock = threading.Lock()
+_limiters = {}  # (base_url, rpm, tpm, max_concurrency) -> RateLimiter
+
+
+def _parse_limit(value):
+    """Turn a configured per-minute limit into a positive number, or None for no limit."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+class RateLimiter:
+    """
+    Pace the requests to one provider with token buckets for requests per minute (rpm)
+    and tokens per minute (tpm), and cap how many requests are in flight at once.
+    A Retry-After from the provider holds back every request until it has passed.
+    """
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=None):
+        self.rpm = _parse_limit(rpm)
+        self.tpm = _parse_limit(tpm)
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.condition = threading.Condition()
+        self.request_budget = self.rpm or 0.0
+        self.token_budget = self.tpm or 0.0
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        if self.rpm:
+            self.request_budget = min(self.rpm, self.request_budget + elapsed * self.rpm / 60)
+        if self.tpm:
+            self.token_budget = min(self.tpm, self.token_budget + elapsed * self.tpm / 60)
+
+    def _wait_time(self, now, tokens):
+        wait = max(0.0, self.paused_until - now)
+        if self.rpm and self.request_budget < 1:
+            wait = max(wait, (1 - self.request_budget) * 60 / self.rpm)
+        if self.tpm and self.token_budget < tokens:
+            wait = max(wait, (tokens - self.token_budget) * 60 / self.tpm)
+        return wait
+
+    def acquire(self, tokens=0):
+        """Block until a request of about `tokens` tokens may be sent."""
+        if self.slots:
+            self.slots.acquire()
+        # A request larger than the whole bucket only waits for a full one
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    break
+                self.condition.wait(wait)
+            if self.rpm:
+                self.request_budget -= 1
+            if self.tpm:
+                self.token_budget -= tokens
+
+    def release(self, estimated_tokens=0, used_tokens=None):
+        """Free the request's slot and settle its token estimate against the reported usage."""
+        if self.tpm and used_tokens is not None:
+            with self.condition:
+                self.token_budget -= used_tokens - min(estimated_tokens, self.tpm)
+        if self.slots:
+            self.slots.release()
+
+    def pause(self, seconds):
+        """Hold back every request to this provider for the given number of seconds."""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+
+
+def get_rate_limiter(base_url, rpm=None, tpm=None, max_concurrency=None):
+    """
+    Return the shared limiter for a provider and its limits. Missing or zero
+    rpm / tpm values mean no limit.
+    """
+    key = (base_url, _parse_limit(rpm), _parse_limit(tpm), max_concurrency)
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(rpm, tpm, max_concurrency)
+            _limiters[key] = limiter
+        return limiter
+
+
+def get_retry_after(headers):
+    """Read the delay in seconds from Retry-After (seconds or an HTTP date) or retry-after-ms."""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        app_logger.debug(f"Unreadable Retry-After header: {retry_after}")
+        return None
+
+
+def get_backoff(attempt):
+    """Exponential backoff with jitter: half of the delay is fixed, the other half random."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
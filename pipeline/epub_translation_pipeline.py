@@ -5,7 +5,7 @@ from bs4 import BeautifulSoup
 from .skip_pipeline import should_translate
 from config.log_config import app_logger
 
-def extract_epub_content_to_json(file_path):
+def extract_epub_content_to_json(file_path, temp_folder=None):
     """
     Extract text content from EPUB file and save in JSON format.
     Preserves HTML structure while extracting translatable text.
@@ -14,8 +14,9 @@ def extract_epub_content_to_json(file_path):
     count = 0
     
     # Create temp directory
-    filename = os.path.splitext(os.path.basename(file_path))[0]
-    temp_folder = os.path.join("temp", filename)
+    if temp_folder is None:
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        temp_folder = os.path.join("temp", filename)
 
     os.makedirs(temp_folder, exist_ok=True)
     
@@ -135,7 +136,7 @@ def extract_epub_content_to_json(file_path):
     return json_path
 
 
-def write_translated_content_to_epub(file_path, original_json_path, translated_json_path):
+def write_translated_content_to_epub(file_path, original_json_path, translated_json_path, result_folder="result"):
     """
     Write translated content back to a new EPUB file, maintaining the original structure
     """
@@ -158,7 +159,6 @@ def write_translated_content_to_epub(file_path, original_json_path, translated_j
         file_elements[file_name].append(element)
     
     # Create output directory
-    result_folder = "result"
     os.makedirs(result_folder, exist_ok=True)
     
     # Create a new EPUB file
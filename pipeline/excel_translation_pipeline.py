@@ -6,7 +6,7 @@ from .skip_pipeline import should_translate
 from config.log_config import app_logger
 
 
-def extract_excel_content_to_json(file_path):
+def extract_excel_content_to_json(file_path, temp_folder=None):
     cell_data = []
     count = 0
     
@@ -231,8 +231,9 @@ def extract_excel_content_to_json(file_path):
         wb.close()
         app.quit()
     
-    filename = os.path.splitext(os.path.basename(file_path))[0]
-    temp_folder = os.path.join("temp", filename)
+    if temp_folder is None:
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
     json_path = os.path.join(temp_folder, "src.json")
     
@@ -242,7 +243,7 @@ def extract_excel_content_to_json(file_path):
     return json_path
 
 
-def write_translated_content_to_excel(file_path, original_json_path, translated_json_path):
+def write_translated_content_to_excel(file_path, original_json_path, translated_json_path, result_folder="result"):
     with open(original_json_path, "r", encoding="utf-8") as original_file:
         original_data = json.load(original_file)
     
@@ -505,7 +506,6 @@ def write_translated_content_to_excel(file_path, original_json_path, translated_
             except Exception as e:
                 app_logger.warning(f"Error processing sheet {sheet_name}: {str(e)}")
         
-        result_folder = os.path.join('result')
         os.makedirs(result_folder, exist_ok=True)
         
         result_path = os.path.join(
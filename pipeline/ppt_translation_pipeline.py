@@ -5,7 +5,7 @@ from zipfile import ZipFile
 from .skip_pipeline import should_translate
 from config.log_config import app_logger
 
-def extract_ppt_content_to_json(file_path):
+def extract_ppt_content_to_json(file_path, temp_folder=None):
     """
     Extract all text content from a PowerPoint file (PPTX) using XML parsing.
     """
@@ -38,8 +38,9 @@ def extract_ppt_content_to_json(file_path):
                     })
 
     # Save content to JSON
-    filename = os.path.splitext(os.path.basename(file_path))[0]
-    temp_folder = os.path.join("temp", filename)
+    if temp_folder is None:
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
     json_path = os.path.join(temp_folder, "src.json")
     with open(json_path, "w", encoding="utf-8") as json_file:
@@ -47,7 +48,7 @@ def extract_ppt_content_to_json(file_path):
 
     return json_path
 
-def write_translated_content_to_ppt(file_path, original_json_path, translated_json_path):
+def write_translated_content_to_ppt(file_path, original_json_path, translated_json_path, result_folder="result", temp_folder="temp"):
     """
     Write translated content back to the PowerPoint file while preserving the format and structure.
     """
@@ -64,7 +65,6 @@ def write_translated_content_to_ppt(file_path, original_json_path, translated_js
     with ZipFile(file_path, 'r') as pptx:
         slides = [name for name in pptx.namelist() if name.startswith('ppt/slides/slide') and name.endswith('.xml')]
 
-    temp_folder = "temp"
     os.makedirs(temp_folder, exist_ok=True)
 
     # Replace text in each slide
@@ -103,7 +103,6 @@ def write_translated_content_to_ppt(file_path, original_json_path, translated_js
                 modified_slide.write(etree.tostring(slide_tree, xml_declaration=True, encoding="UTF-8", standalone="yes"))
 
     # Create a new PowerPoint file with modified content
-    result_folder = "result"
     os.makedirs(result_folder, exist_ok=True)
     result_path = os.path.join(result_folder, f"{os.path.splitext(os.path.basename(file_path))[0]}_translated.pptx")
 
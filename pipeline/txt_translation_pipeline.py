@@ -3,7 +3,7 @@ import os
 from .skip_pipeline import should_translate
 from config.log_config import app_logger
 
-def extract_txt_content_to_json(file_path):
+def extract_txt_content_to_json(file_path, temp_folder=None):
     """
     Extract all text content from TXT file and save in JSON format, each original paragraph counted separately
     Respect short lines as independent paragraphs, regardless of whether they end with punctuation
@@ -16,8 +16,9 @@ def extract_txt_content_to_json(file_path):
         content = txt_file.read()
         
     # Save original content
-    filename = os.path.splitext(os.path.basename(file_path))[0]
-    temp_folder = os.path.join("temp", filename)
+    if temp_folder is None:
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
     with open(os.path.join(temp_folder, "original_content.txt"), "w", encoding="utf-8") as original_file:
         original_file.write(content)
@@ -47,7 +48,7 @@ def extract_txt_content_to_json(file_path):
     app_logger.info(f"TXT content extracted to: {json_path}, total {count} paragraphs")
     return json_path
 
-def write_translated_content_to_txt(file_path, original_json_path, translated_json_path):
+def write_translated_content_to_txt(file_path, original_json_path, translated_json_path, result_folder="result"):
     """
     Write translated content back to a new TXT file, maintaining original paragraph format
     """
@@ -59,7 +60,6 @@ def write_translated_content_to_txt(file_path, original_json_path, translated_js
         translated_data = json.load(translated_file)
     
     # Create output file
-    result_folder = "result"
     os.makedirs(result_folder, exist_ok=True)
     result_path = os.path.join(result_folder, f"{os.path.splitext(os.path.basename(file_path))[0]}_translated.txt")
     
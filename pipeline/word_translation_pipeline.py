@@ -5,7 +5,7 @@ from zipfile import ZipFile
 from .skip_pipeline import should_translate
 from config.log_config import app_logger
 
-def extract_word_content_to_json(file_path):
+def extract_word_content_to_json(file_path, temp_folder=None):
     with ZipFile(file_path, 'r') as docx:
         document_xml = docx.read('word/document.xml')
         
@@ -194,8 +194,9 @@ def extract_word_content_to_json(file_path):
                             "value": cell_text.replace("\n", "␊").replace("\r", "␍")
                         })
 
-    filename = os.path.splitext(os.path.basename(file_path))[0]
-    temp_folder = os.path.join("temp", filename)
+    if temp_folder is None:
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        temp_folder = os.path.join("temp", filename)
     os.makedirs(temp_folder, exist_ok=True)
     json_path = os.path.join(temp_folder, "src.json")
     with open(json_path, "w", encoding="utf-8") as json_file:
@@ -205,7 +206,7 @@ def extract_word_content_to_json(file_path):
     return json_path
 
 
-def write_translated_content_to_word(file_path, original_json_path, translated_json_path):
+def write_translated_content_to_word(file_path, original_json_path, translated_json_path, result_folder="result", temp_folder="temp"):
     with open(original_json_path, "r", encoding="utf-8") as original_file:
         original_data = json.load(original_file)
     
@@ -363,7 +364,6 @@ def write_translated_content_to_word(file_path, original_json_path, translated_j
                 app_logger.error(f"Error updating header/footer table cell: {e}")
 
     # Create temp directory structure
-    temp_folder = "temp"
     os.makedirs(temp_folder, exist_ok=True)
     temp_word_folder = os.path.join(temp_folder, "word")
     os.makedirs(temp_word_folder, exist_ok=True)
@@ -383,7 +383,6 @@ def write_translated_content_to_word(file_path, original_json_path, translated_j
         header_footer_paths[hf_file] = modified_hf_path
 
     # Create result file
-    result_folder = "result"
     os.makedirs(result_folder, exist_ok=True)
     result_path = os.path.join(result_folder, f"{os.path.splitext(os.path.basename(file_path))[0]}_translated.docx")
 
@@ -0,0 +1,31 @@
+import pytest
+import tiktoken
+import tiktoken.registry
+
+from textProcessing.tokenizer import DEFAULT_ENCODING, clear_token_count_cache, get_encoder
+
+# cl100k_base's pre-split pattern over a small byte-level vocabulary: token counts follow the
+# real tokenizer's line and word boundaries without downloading its vocabulary
+_CL100K_PATTERN = r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+_MERGES = ["  ", "    ", "th", "the", "he", "in", "er", "an", '",', '":', ' "']
+
+
+def _build_encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in _MERGES:
+        ranks[merge.encode("utf-8")] = len(ranks)
+    return tiktoken.Encoding("offline_cl100k", pat_str=_CL100K_PATTERN, mergeable_ranks=ranks, special_tokens={})
+
+
+_OFFLINE_ENCODING = _build_encoding()
+
+
+@pytest.fixture
+def offline_tokenizer(monkeypatch):
+    """Serve the default encoding from the local vocabulary above and start with empty token caches."""
+    monkeypatch.setitem(tiktoken.registry.ENCODINGS, DEFAULT_ENCODING, _OFFLINE_ENCODING)
+    get_encoder.cache_clear()
+    clear_token_count_cache()
+    yield DEFAULT_ENCODING
+    get_encoder.cache_clear()
+    clear_token_count_cache()
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import threading
+import time
+
+import pytest
+
+import translator.base_translator as base_translator
+from textProcessing.text_separator import load_json_records
+from translator.base_translator import DocumentTranslator
+from translator.translation_checker import save_json
+from translator.txt_translator import TxtTranslator
+
+
+def _make_translator(tmp_path, max_retries=0, **kwargs):
+    input_path = tmp_path / "doc.txt"
+    input_path.write_text("Hello world\n", encoding="utf-8")
+    return DocumentTranslator(
+        str(input_path), "test-model", False, "", "en", "zh", max_token=4096, max_retries=max_retries,
+        workspace_root=str(tmp_path / "temp"), result_root=str(tmp_path / "result"), **kwargs
+    )
+
+
+def test_segments_commit_in_order_when_later_ones_finish_first(tmp_path):
+    translator = _make_translator(tmp_path, max_concurrency=4)
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def translate_segment(segment, previous_text, source_context=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        # Each segment takes longer than the three sent after it
+        time.sleep(0.02 * (4 - int(segment) % 4))
+        with lock:
+            active -= 1
+        return f"translated {segment}"
+
+    translator._translate_segment = translate_segment
+    committed = []
+    translator._dispatch_segments(
+        lambda: ((str(i), (i + 1) / 12) for i in range(12)),
+        lambda segment, progress, future: committed.append((segment, progress, future.result())),
+    )
+
+    assert committed == [(str(i), (i + 1) / 12, f"translated {i}") for i in range(12)]
+    assert 1 < peak <= 4
+
+
+def _translate_entries(segment):
+    entries = json.loads(re.search(r"```json\n(.*)\n```", segment, re.S).group(1))
+    translated = {count: f"译{value}" for count, value in entries.items()}
+    return entries, f"```json\n{json.dumps(translated, ensure_ascii=False, indent=4)}\n```"
+
+
+def test_failed_entries_are_retried_in_halving_batches(tmp_path, monkeypatch, offline_tokenizer):
+    translator = _make_translator(tmp_path, max_retries=4, max_concurrency=1)
+    os.makedirs(translator.file_dir)
+    save_json(translator.failed_json_path, [{"count": i, "value": f"Entry {i}"} for i in range(1, 9)])
+    sent = []
+
+    def translate_text(segment, previous_text, *args, **kwargs):
+        entries, response = _translate_entries(segment)
+        sent.append([int(count) for count in entries])
+        if "5" in entries:
+            raise RuntimeError("model error")
+        return response
+
+    monkeypatch.setattr(base_translator, "translate_text", translate_text)
+    progress = []
+    still_failed = translator.retranslate_failed_content(lambda value, desc: progress.append(value))
+
+    # A failed batch comes back as two halves, ahead of the batches still waiting
+    assert sent == [[1, 2, 3, 4, 5, 6, 7, 8], [1, 2, 3, 4], [5, 6, 7, 8], [5, 6], [5], [6], [7, 8]]
+    assert still_failed
+    assert load_json_records(translator.failed_json_path) == [{"count": 5, "value": "Entry 5"}]
+    assert sorted(int(item["count"]) for item in load_json_records(translator.result_split_json_path)) == [1, 2, 3, 4, 6, 7, 8]
+    assert progress == sorted(progress) and progress[-1] == 1.0
+
+
+def test_interrupted_job_resumes_with_its_committed_entries(tmp_path, monkeypatch, offline_tokenizer):
+    input_path = tmp_path / "doc.txt"
+    input_path.write_text("".join(f"Line number {i} with some words\n" for i in range(60)), encoding="utf-8")
+    sent = []
+    interrupt_after = [3]
+
+    def translate_text(segment, previous_text, *args, **kwargs):
+        if interrupt_after[0] is not None and len(sent) == interrupt_after[0]:
+            raise KeyboardInterrupt
+        entries, response = _translate_entries(segment)
+        sent.append(list(entries))
+        return response
+
+    monkeypatch.setattr(base_translator, "translate_text", translate_text)
+    monkeypatch.setattr(base_translator, "prepare_model", lambda *args: None)
+
+    def make_translator():
+        return TxtTranslator(
+            str(input_path), "test-model", False, "", "en", "zh", max_token=1500, max_retries=1,
+            max_concurrency=1, resume=True,
+            workspace_root=str(tmp_path / "temp"), result_root=str(tmp_path / "result"),
+        )
+
+    first = make_translator()
+    with pytest.raises(KeyboardInterrupt):
+        first.process(str(tmp_path / "doc"), ".txt")
+    first_counts = {count for counts in sent for count in counts}
+    assert os.path.exists(first.result_split_json_path)
+    assert not os.path.exists(first.file_dir + ".lock")
+
+    interrupt_after[0] = None
+    second = make_translator()
+    output_path, missing = second.process(str(tmp_path / "doc"), ".txt")
+    second_counts = [count for counts in sent[3:] for count in counts]
+
+    assert second.file_dir == first.file_dir
+    assert first_counts.isdisjoint(second_counts)
+    assert first_counts.union(second_counts) == {str(i) for i in range(1, 61)}
+    assert not missing
+    with open(output_path, encoding="utf-8") as f:
+        lines = [line for line in f.read().splitlines() if line]
+    assert lines == [f"译Line number {i} with some words" for i in range(60)]
+    assert not os.path.exists(second.file_dir)
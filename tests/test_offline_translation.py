@@ -0,0 +1,70 @@
+import json
+import re
+
+import pytest
+
+from llmWrapper.offline_translation import _read_stream
+
+MESSAGES = [{"role": "user", "content": "Translate the following text. " * 20}]
+
+
+class StreamedResponse:
+    """A streamed /api/chat response that sends its content a few characters per chunk."""
+
+    def __init__(self, content):
+        self.pieces = re.findall(r".{1,3}", content, re.S)
+        self.read = 0
+        self.closed = False
+
+    def iter_lines(self):
+        for i, piece in enumerate(self.pieces):
+            self.read += 1
+            yield json.dumps({"message": {"content": piece}, "done": i == len(self.pieces) - 1}).encode("utf-8")
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_stops_at_the_closing_brace(offline_tokenizer):
+    segment = '```json\n{\n    "1": "一",\n    "2": "二"\n}\n```'
+    response = StreamedResponse("<think>Let me see. </think>" + segment + "\nHope this helps! " + "More text. " * 40)
+
+    assert _read_stream(response, MESSAGES, ["1", "2"]) == segment[:segment.rindex("}") + 1]
+    assert response.closed
+    assert response.read < len(response.pieces) // 2
+
+
+def test_stream_of_lines_stops_soon_after_the_last_key(offline_tokenizer):
+    response = StreamedResponse("1: a\n2: b\n" + "extra " * 40)
+
+    text = _read_stream(response, MESSAGES, ["1", "2"])
+    assert text.startswith("1: a\n2: b\n")
+    assert response.read < len(response.pieces) // 2
+
+
+def test_stream_stops_when_the_output_repeats(offline_tokenizer):
+    response = StreamedResponse('{"1": "' + "la la " * 300)
+
+    text = _read_stream(response, MESSAGES, ["1"])
+    assert text.startswith('{"1": "la la')
+    assert len(text) < 600
+    assert response.closed
+    assert response.read < len(response.pieces) // 2
+
+
+def test_stream_without_expected_keys_reads_to_the_end(offline_tokenizer):
+    response = StreamedResponse("<think>hmm</think>Bonjour <b>")
+
+    assert _read_stream(response, MESSAGES) == "Bonjour <b>"
+    assert response.read == len(response.pieces)
+
+
+def test_stream_error_is_raised(offline_tokenizer):
+    class ErrorResponse(StreamedResponse):
+        def iter_lines(self):
+            yield json.dumps({"error": "model not found"}).encode("utf-8")
+
+    response = ErrorResponse("")
+    with pytest.raises(RuntimeError, match="model not found"):
+        _read_stream(response, MESSAGES, ["1"])
+    assert response.closed
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+cache = pytest.importorskip("translator.PDFMathTranslate.cache")
+
+
+@pytest.fixture
+def cache_db(tmp_path):
+    cache.init_db(cache_folder=str(tmp_path))
+    yield
+    cache.clean_db()
+
+
+def _stored_rows():
+    return [
+        (record.id, record.original_text, record.translation)
+        for record in cache._TranslationCache.select().order_by(cache._TranslationCache.id)
+    ]
+
+
+def test_set_rows_are_readable_before_flush_and_keep_their_order(cache_db):
+    translation_cache = cache.TranslationCache("test", {"lang_out": "zh"})
+    translation_cache.set("one", "一")
+    translation_cache.set("two", "二")
+    translation_cache.set("one", "壹")
+    translation_cache.set("three", "三")
+
+    assert _stored_rows() == []
+    assert translation_cache.get("one") == "壹"
+
+    translation_cache.flush()
+    # Setting a text again moves it to the end, like ON CONFLICT REPLACE does
+    assert _stored_rows() == [(1, "two", "二"), (2, "one", "壹"), (3, "three", "三")]
+    assert translation_cache.get("one") == "壹"
+    assert cache.TranslationCache("test", {"lang_out": "fr"}).get("one") is None
+
+
+def test_pending_rows_are_written_once_enough_pile_up(cache_db, monkeypatch):
+    monkeypatch.setattr(cache, "WRITE_BEHIND_ROWS", 3)
+    translation_cache = cache.TranslationCache("test")
+    translation_cache.set("a", "A")
+    translation_cache.set("b", "B")
+    assert _stored_rows() == []
+
+    translation_cache.set("c", "C")
+    assert _stored_rows() == [(1, "a", "A"), (2, "b", "B"), (3, "c", "C")]
+
+
+def test_translations_from_json_are_applied_in_batches(cache_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "UPDATE_BATCH_ROWS", 2)
+    translation_cache = cache.TranslationCache("test")
+    for i in range(1, 6):
+        translation_cache.set(f"text {i}", "")
+
+    src_path = tmp_path / "src.json"
+    translation_cache.export_translation_to_json(str(src_path))
+    assert json.loads(src_path.read_text(encoding="utf-8")) == [{"count": i, "value": f"text {i}"} for i in range(1, 6)]
+
+    translated_path = tmp_path / "dst_translated.json"
+    translated = [{"count": str(i), "translated": f"译文 {i}"} for i in range(1, 5)]
+    # The last translation of a count wins
+    translated.append({"count": "2", "translated": "译文 2b"})
+    translated_path.write_text(json.dumps(translated, ensure_ascii=False), encoding="utf-8")
+    translation_cache.update_translations_from_json(str(translated_path))
+
+    assert _stored_rows() == [
+        (1, "text 1", "译文 1"),
+        (2, "text 2", "译文 2b"),
+        (3, "text 3", "译文 3"),
+        (4, "text 4", "译文 4"),
+        (5, "text 5", ""),
+    ]
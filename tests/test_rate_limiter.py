@@ -0,0 +1,126 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import llmWrapper.online_translation as online_translation
+from llmWrapper.rate_limiter import RateLimiter, get_rate_limiter, get_retry_after
+
+
+def _elapsed(function, *args):
+    start = time.monotonic()
+    function(*args)
+    return time.monotonic() - start
+
+
+def test_request_bucket_waits_for_a_refill_once_empty():
+    # 600 requests per minute refill one request every 0.1s
+    limiter = RateLimiter(rpm=600)
+    assert _elapsed(lambda: [limiter.acquire() for _ in range(600)]) < 0.05
+    assert 0.07 < _elapsed(limiter.acquire) < 0.5
+
+
+def test_token_bucket_waits_for_the_tokens_of_the_request():
+    # 60000 tokens per minute refill 100 tokens every 0.1s
+    limiter = RateLimiter(tpm=60000)
+    assert _elapsed(limiter.acquire, 60000) < 0.05
+    assert 0.07 < _elapsed(limiter.acquire, 100) < 0.5
+
+
+def test_request_larger_than_the_bucket_only_waits_for_a_full_one():
+    limiter = RateLimiter(tpm=60000)
+    assert _elapsed(limiter.acquire, 10 ** 9) < 0.05
+
+
+def test_release_settles_the_estimate_against_the_reported_usage():
+    limiter = RateLimiter(tpm=60000)
+    limiter.acquire(30000)
+    limiter.release(30000, used_tokens=10000)
+    assert 49000 < limiter.token_budget <= 60000
+
+
+def test_pause_holds_back_every_request():
+    limiter = RateLimiter()
+    limiter.pause(0.15)
+    assert _elapsed(limiter.acquire) >= 0.14
+
+
+def test_limiters_are_shared_per_provider_and_limits():
+    assert get_rate_limiter("https://a.example/v1", 60, None, 4) is get_rate_limiter("https://a.example/v1", "60", 0, 4)
+    assert get_rate_limiter("https://a.example/v1", 60, None, 4) is not get_rate_limiter("https://b.example/v1", 60, None, 4)
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after": "3"}, 3.0),
+    ({"retry-after-ms": "1500", "retry-after": "3"}, 1.5),
+    ({"retry-after": "-1"}, 0.0),
+    ({"retry-after": "soon"}, None),
+    ({}, None),
+    (None, None),
+])
+def test_retry_after_headers(headers, expected):
+    assert get_retry_after(headers) == expected
+
+
+def test_retry_after_http_date():
+    assert 8 < get_retry_after({"retry-after": formatdate(time.time() + 10, usegmt=True)}) <= 10
+
+
+def _status_error(error_class, status_code, headers):
+    request = httpx.Request("POST", "https://api.example/v1/chat/completions")
+    return error_class("error", response=httpx.Response(status_code, headers=headers, request=request), body=None)
+
+
+def _run_translate_online(monkeypatch, base_url, errors):
+    """Run translate_online against a client that raises errors before answering; return the answer and the sleeps."""
+    def create(**params):
+        if errors:
+            raise errors.pop(0)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="<think>...</think>Bonjour"))],
+            usage=SimpleNamespace(total_tokens=20),
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(online_translation, "load_model_config", lambda model: {"base_url": base_url, "model": "test-model"})
+    monkeypatch.setattr(online_translation, "get_openai_client", lambda *args: client)
+    monkeypatch.setattr(online_translation, "get_backoff", lambda attempt: 0.5 * (attempt + 1))
+    sleeps = []
+    monkeypatch.setattr(online_translation.time, "sleep", sleeps.append)
+    answer = online_translation.translate_online("key", [{"role": "user", "content": "Hello"}], "test-model")
+    return answer, sleeps
+
+
+def test_rate_limited_request_waits_for_retry_after_and_pauses_the_provider(monkeypatch, offline_tokenizer):
+    base_url = "https://retry-after.example/v1"
+    answer, sleeps = _run_translate_online(monkeypatch, base_url, [
+        _status_error(openai.RateLimitError, 429, {"retry-after-ms": "50"}),
+    ])
+
+    assert answer == "Bonjour"
+    assert sleeps == [0.05]
+    assert get_rate_limiter(base_url, None, None, online_translation.DEFAULT_ONLINE_CONCURRENCY).paused_until > 0
+
+
+def test_server_errors_back_off_without_pausing_the_provider(monkeypatch, offline_tokenizer):
+    base_url = "https://backoff.example/v1"
+    answer, sleeps = _run_translate_online(monkeypatch, base_url, [
+        _status_error(openai.InternalServerError, 500, {}),
+        _status_error(openai.InternalServerError, 503, {}),
+    ])
+
+    assert answer == "Bonjour"
+    assert sleeps == [0.5, 1.0]
+    assert get_rate_limiter(base_url, None, None, online_translation.DEFAULT_ONLINE_CONCURRENCY).paused_until == 0
+
+
+def test_client_errors_are_not_retried(monkeypatch, offline_tokenizer):
+    answer, sleeps = _run_translate_online(monkeypatch, "https://bad-request.example/v1", [
+        _status_error(openai.BadRequestError, 400, {}),
+    ])
+
+    assert answer == "API request failed."
+    assert sleeps == []
@@ -0,0 +1,51 @@
+import json
+import os
+
+from textProcessing.segment_benchmark import generate_src_split, legacy_pack_segments, load_entries
+from textProcessing.text_separator import deduplicate_entries, get_journal_path, load_journal, pack_segments, stream_segment_json
+from translator.translation_checker import clean_json
+
+
+def test_deduplicate_entries_keeps_different_line_breaks_apart():
+    entries = [
+        {"count": 1, "value": "Hello world"},
+        {"count": 2, "value": "Hello\nworld"},
+        {"count": 3, "value": "  Hello world "},
+    ]
+    representatives, duplicates = deduplicate_entries(entries)
+    assert [entry["count"] for entry in representatives] == [1, 2]
+    assert duplicates == {1: [3]}
+
+
+def test_pack_segments_matches_the_legacy_packer(tmp_path, offline_tokenizer):
+    path = tmp_path / "src_split.json"
+    generate_src_split(str(path), 400)
+    entries = load_entries(str(path))
+    # A count that appears again replaces its earlier value inside the segment
+    entries[10:10] = [(10_000, entries[5][1], "Replaced value"), (10_001, entries[12][1], "Another one")]
+
+    for max_token in (120, 400, 1500):
+        packed = list(pack_segments(entries, max_token, 60, offline_tokenizer))
+        assert packed == list(legacy_pack_segments(entries, max_token, 60, offline_tokenizer))
+        assert len(packed) > 1
+
+
+def _segment_counts(segment):
+    return list(json.loads(clean_json(segment)))
+
+
+def test_interrupted_segmentation_resumes_from_the_journal(tmp_path, offline_tokenizer):
+    path = tmp_path / "src_split.json"
+    path.write_text(json.dumps([{"count": i, "value": f"Entry number {i}"} for i in range(1, 41)]), encoding="utf-8")
+    prompts = ("System", "Translate", "Previous", "Context")
+
+    segments = stream_segment_json(str(path), 150, *prompts, offline_tokenizer)()
+    sent = [_segment_counts(next(segments)[0]) for _ in range(2)]
+    segments.close()
+
+    journal_path = get_journal_path(str(path))
+    assert load_journal(journal_path) == {count for counts in sent for count in counts}
+
+    resumed = [_segment_counts(segment) for segment, _ in stream_segment_json(str(path), 150, *prompts, offline_tokenizer)()]
+    assert [int(count) for counts in sent + resumed for count in counts] == list(range(1, 41))
+    assert not os.path.exists(journal_path)
@@ -0,0 +1,20 @@
+import json
+
+from translator.translation_checker import process_translation_results, salvage_translated_json
+
+
+def test_salvage_rejects_value_broken_by_unescaped_quote():
+    broken = '{"1": "Il a dit "bonjour" à tous", "2": "Bonne journée"}'
+    assert salvage_translated_json(broken) == {"2": "Bonne journée"}
+
+
+def test_broken_value_goes_to_retry(tmp_path):
+    original = json.dumps({"1": 'He said "hello" to everyone', "2": "Have a nice day"})
+    broken = '{"1": "Il a dit "bonjour" à tous", "2": "Bonne journée"}'
+    result_path = tmp_path / "results.jsonl"
+
+    failed = process_translation_results(original, broken, str(result_path), None, "en", "fr")
+
+    assert failed == [{"count": 1, "value": 'He said "hello" to everyone'}]
+    saved = [json.loads(line) for line in result_path.read_text(encoding="utf-8").splitlines()]
+    assert [entry["count"] for entry in saved] == ["2"]
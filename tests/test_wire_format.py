@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import llmWrapper.llm_wrapper as llm_wrapper
+from textProcessing.text_separator import create_segment_output
+from translator.translation_checker import clean_json, decode_wire_response, encode_context_for_wire, encode_segment_for_wire
+
+
+def _decode(text, expected_keys=None):
+    return json.loads(clean_json(decode_wire_response(text, "lines", expected_keys)))
+
+
+ENTRIES = {"1": "Hello", "2": "Two\nlines", "3": 'A "quoted" C:\\path'}
+
+
+def test_lines_encoding_escapes_line_breaks_and_backslashes():
+    encoded = encode_segment_for_wire(create_segment_output(ENTRIES), "lines")
+    assert encoded == '1: Hello\n2: Two\\nlines\n3: A "quoted" C:\\\\path'
+    assert _decode(encoded, list(ENTRIES)) == ENTRIES
+
+
+def test_minified_encoding_is_one_line_of_json():
+    encoded = encode_segment_for_wire(create_segment_output(ENTRIES), "minified")
+    assert "\n" not in encoded
+    assert json.loads(encoded) == ENTRIES
+    # Minified responses are JSON already and go through unchanged
+    assert decode_wire_response(encoded, "minified") == encoded
+
+
+def test_json_format_leaves_segment_and_response_alone():
+    segment = create_segment_output(ENTRIES)
+    assert encode_segment_for_wire(segment, "json") == segment
+    assert decode_wire_response(segment, "json", list(ENTRIES)) == segment
+
+
+@pytest.mark.parametrize("wire_format", ["minified", "lines"])
+def test_context_lines_are_reencoded(wire_format):
+    context = '    "7": "Previous line",\n    "8": "Last line"'
+    encoded = encode_context_for_wire(context, wire_format)
+    expected = {"7": "Previous line", "8": "Last line"}
+    if wire_format == "minified":
+        assert json.loads(encoded) == expected
+    else:
+        assert encoded == "7: Previous line\n8: Last line"
+
+
+def test_lines_response_drops_fences_and_remarks():
+    response = "```\nHere is the translation:\n1: Bonjour\n2: Deux\\nlignes\n```\nHope this helps!"
+    assert _decode(response, ["1", "2"]) == {"1": "Bonjour", "2": "Deux\nlignes"}
+
+
+def test_lines_value_wrapped_onto_numbered_line_stays_with_its_entry():
+    response = "1: Rendez-vous à\n10:30 demain\n2: Merci"
+    assert _decode(response, ["1", "2"]) == {"1": "Rendez-vous à\n10:30 demain", "2": "Merci"}
+
+
+def test_lines_response_without_numbered_lines_is_returned_as_is():
+    assert decode_wire_response("Sorry, I cannot help.", "lines", ["1"]) == "Sorry, I cannot help."
+
+
+def test_ollama_models_pick_their_wire_format(tmp_path, monkeypatch):
+    config_path = tmp_path / "system_config.json"
+    config_path.write_text(json.dumps({"offline_wire_formats": {"qwen2.5": "lines", "llama3:8b": "minified"}}), encoding="utf-8")
+    monkeypatch.setattr(llm_wrapper, "SYSTEM_CONFIG_PATH", str(config_path))
+
+    assert llm_wrapper.get_wire_format("qwen2.5:7b", False) == "lines"
+    assert llm_wrapper.get_wire_format("llama3:8b", False) == "minified"
+    assert llm_wrapper.get_wire_format("llama3:70b", False, "json") == "json"
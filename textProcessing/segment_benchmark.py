@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for segment packing in stream_segment_json.
+
+Builds a synthetic src_split.json, packs it with pack_segments and with the
+previous approach (re-serialize and re-tokenize the whole segment for every
+entry), checks that both produce the same segments and prints the timings.
+
+    python -m textProcessing.segment_benchmark --entries 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from textProcessing.text_separator import pack_segments, num_tokens_from_string
+from textProcessing.tokenizer import DEFAULT_ENCODING, clear_token_count_cache
+
+WORDS = [
+    "Total", "Revenue", "Quarter", "Summary", "Region", "North", "South", "Product",
+    "Price", "Amount", "Customer", "Invoice", "Date", "Status", "Pending", "Approved",
+    "合計", "売上", "地域", "产品", "状态", "客户", "Überblick", "Größe", "año",
+]
+
+
+def generate_src_split(path, entries, seed=0):
+    """Write a synthetic src_split.json with short, spreadsheet-like values."""
+    rng = random.Random(seed)
+    data = []
+    for count in range(1, entries + 1):
+        value = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+        if rng.random() < 0.3:
+            value += rng.choice([".", ":", "!", "?", " 42", " (draft)", '"'])
+        data.append({"count": count, "type": "cell", "value": value, "original_count": count})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def load_entries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        cell_data = json.load(f)
+    return [
+        (i, str(cell["count"]), cell["value"].strip())
+        for i, cell in enumerate(cell_data)
+        if cell.get("count") is not None and cell.get("value", "").strip()
+    ]
+
+
+def legacy_pack_segments(entries, max_token, prompt_token_count, encoding_name=DEFAULT_ENCODING):
+    """The previous packing loop, which re-tokenizes the whole segment per entry."""
+    current_segment_dict = {}
+    current_indices = []
+    for i, count, value in entries:
+        line_dict = {count: value}
+        new_segment_str = f"```json\n{json.dumps(current_segment_dict | line_dict, ensure_ascii=False, indent=4)}\n```"
+        new_token_count = prompt_token_count + num_tokens_from_string(new_segment_str, encoding_name)
+        if new_token_count > max_token:
+            if current_segment_dict:
+                yield current_segment_dict, current_indices
+            current_segment_dict = line_dict
+            current_indices = [i]
+        else:
+            current_segment_dict.update(line_dict)
+            current_indices.append(i)
+    if current_segment_dict:
+        yield current_segment_dict, current_indices
+
+
+def timed(packer, entries, max_token, prompt_token_count, encoding_name):
+    # Start every run with a cold token-count cache
+    clear_token_count_cache()
+    start = time.perf_counter()
+    segments = list(packer(entries, max_token, prompt_token_count, encoding_name))
+    return segments, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000, help="Number of entries in the synthetic src_split.json")
+    parser.add_argument("--max-token", type=int, default=768, help="Token budget per request")
+    parser.add_argument("--prompt-tokens", type=int, default=300, help="Tokens already used by the prompts")
+    parser.add_argument("--tokenizer", default=DEFAULT_ENCODING, help="tiktoken encoding used for counting")
+    parser.add_argument("--legacy-limit", type=int, default=None, help="Only run the legacy packer on the first N entries")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "src_split.json")
+        generate_src_split(path, args.entries)
+        entries = load_entries(path)
+
+    segments, elapsed = timed(pack_segments, entries, args.max_token, args.prompt_tokens, args.tokenizer)
+    print(f"pack_segments:  {len(entries)} entries -> {len(segments)} segments in {elapsed:.2f}s")
+
+    legacy_entries = entries[:args.legacy_limit] if args.legacy_limit else entries
+    legacy_segments, legacy_elapsed = timed(legacy_pack_segments, legacy_entries, args.max_token, args.prompt_tokens, args.tokenizer)
+    print(f"legacy packing: {len(legacy_entries)} entries -> {len(legacy_segments)} segments in {legacy_elapsed:.2f}s")
+
+    compared, _ = timed(pack_segments, legacy_entries, args.max_token, args.prompt_tokens, args.tokenizer)
+    if compared != legacy_segments:
+        raise SystemExit("Segments differ from the legacy packing!")
+    print("Segments are identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,38 +2,28 @@ import json
 import copy
 import os
 import re
-import shutil
-import tiktoken
-from tiktoken_ext import openai_public
-import tiktoken_ext
+import unicodedata
+from config.log_config import app_logger
+from textProcessing.tokenizer import DEFAULT_ENCODING, count_tokens, count_tokens_batch, get_encoder
 
-def stream_segment_json(json_file_path, max_token, system_prompt, user_prompt, previous_prompt, previous_text):
+def stream_segment_json(json_file_path, max_token, system_prompt, user_prompt, previous_prompt, previous_text, encoding_name=DEFAULT_ENCODING):
     """
     Process JSON in segments, ensuring each segment's token count does not exceed max_token.
-    First creates a copy of the original JSON file with "_translating" suffix and works on the copy.
-    After processing each segment, clears this data from the copied file.
+    Tokens are counted with the model's tokenizer (encoding_name).
+    The counts of every yielded segment are appended to a "_journal.jsonl" file next to the
+    source, and entries already listed there are skipped, so an interrupted run picks up
+    where it stopped. The source file itself is never rewritten.
     Tracks and reports progress using count-based calculation.
     """
-    # Create a copy of the original JSON file with "_translating" suffix
-    file_dir = os.path.dirname(json_file_path)
-    file_name = os.path.basename(json_file_path)
-    base_name, ext = os.path.splitext(file_name)
+    journal_path = get_journal_path(json_file_path)
     
-    # Generate working copy filename
-    working_copy_path = os.path.join(file_dir, f"{base_name}_translating{ext}")
-    
-    # Copy the original file
-    if not os.path.exists(working_copy_path):
-        shutil.copy2(json_file_path, working_copy_path)
-    
-    # Load JSON data from the working copy
-    with open(working_copy_path, "r", encoding="utf-8") as json_file:
-        cell_data = json.load(json_file)
+    # Load JSON data from the source file (a JSON array or a JSONL store)
+    cell_data = load_json_records(json_file_path)
 
     if not cell_data:
-        # Clean up working copy if empty
-        if os.path.exists(working_copy_path):
-            os.remove(working_copy_path)
+        # Clean up the journal if there is nothing to process
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
         raise ValueError("cell_data is empty. Please check the input data.")
 
     # Get the maximum count value for progress calculation
@@ -41,111 +31,182 @@ def stream_segment_json(json_file_path, max_token, system_prompt, user_prompt, p
 
     # Pre-calculate token count from prompts and previous text
     prompt_token_count = sum(
-        num_tokens_from_string(json.dumps(prompt, ensure_ascii=False))
+        num_tokens_from_string(json.dumps(prompt, ensure_ascii=False), encoding_name)
         for prompt in [system_prompt, user_prompt, previous_prompt, previous_text]
         if prompt  # Ignore None or empty strings
     )
 
-    # Create a list of processed entries for tracking items to be removed from the file
-    processed_indices = []
+    # Counts already sent by an earlier, interrupted run
+    processed_counts = load_journal(journal_path)
     
     def get_next_segment():
         """
         Generator function that yields JSON segments with token counts within the limit
-        and progress updates. After yielding each segment, removes processed data 
-        from the working copy file.
+        and progress updates. After yielding each segment, records its counts in the journal.
         """
-        nonlocal processed_indices
-        
-        current_segment_dict = {}
-        current_token_count = prompt_token_count
-        current_processed_indices = []
-
+        # Collect the entries still to be sent, skipping invalid, empty or journaled cells
+        entries = []
         for i, cell in enumerate(cell_data):
-            if i in processed_indices:
-                continue  # Skip already processed entries
-                
             count = cell.get("count")
             value = cell.get("value", "").strip()
             if count is None or not value:
-                processed_indices.append(i)  # Mark invalid entries as processed
-                continue  # Skip invalid or empty cells
-
-            line_dict = {str(count): value}
-            new_segment_str = f"```json\n{json.dumps(current_segment_dict | line_dict, ensure_ascii=False, indent=4)}\n```"
-            new_token_count = prompt_token_count + num_tokens_from_string(new_segment_str)
-
-            if new_token_count > max_token:
-                # If adding this line exceeds max_token, yield the current segment
-                if current_segment_dict:
-                    # Update the processed indices list
-                    processed_indices.extend(current_processed_indices)
-                    
-                    # Output segment and update working copy file
-                    progress = calculate_progress(current_segment_dict, max_count)
-                    segment_output = create_segment_output(current_segment_dict)
-                    
-                    # Remove processed data from working copy file
-                    update_source_file(working_copy_path, processed_indices)
-                    
-                    yield segment_output, progress
-                
-                # Start a new segment with the current line
-                current_segment_dict = line_dict
-                current_processed_indices = [i]
-                current_token_count = prompt_token_count + num_tokens_from_string(
-                    f"```json\n{json.dumps(current_segment_dict, ensure_ascii=False, indent=4)}\n```"
-                )
-            else:
-                # Add the current line to the segment
-                current_segment_dict.update(line_dict)
-                current_processed_indices.append(i)
-                current_token_count = new_token_count
+                continue
+            count = str(count)
+            if count in processed_counts:
+                continue  # Skip already processed entries
+            entries.append((i, count, value))
 
-        # Yield the final segment
-        if current_segment_dict:
-            processed_indices.extend(current_processed_indices)
-            progress = calculate_progress(current_segment_dict, max_count)
-            segment_output = create_segment_output(current_segment_dict)
+        for segment_dict, segment_indices in pack_segments(entries, max_token, prompt_token_count, encoding_name):
+            processed_counts.update(segment_dict)
+            progress = calculate_progress(segment_dict, max_count)
+            segment_output = create_segment_output(segment_dict)
             
-            # Remove processed data from working copy file
-            update_source_file(working_copy_path, processed_indices)
+            # Record the processed counts in the journal
+            append_to_journal(journal_path, segment_dict)
             
             yield segment_output, progress
         
-        # Clean up the working copy file when all processing is complete
+        # Clean up the journal when all processing is complete
         try:
-            if os.path.exists(working_copy_path):
-                os.remove(working_copy_path)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
         except Exception as e:
-            print(f"Warning: Could not remove working copy file: {e}")
+            app_logger.warning(f"Could not remove progress journal: {e}")
 
     return get_next_segment
 
-def update_source_file(json_file_path, processed_indices):
+def load_json_records(file_path):
     """
-    Remove processed entries from the source JSON file
-    
-    Args:
-        json_file_path (str): Path to the JSON file
-        processed_indices (list): List of indices of processed entries
+    Load a list of records from a JSON array file or, for ".jsonl" files, from an
+    append-only store with one JSON object per line.
+    A partially written last line of a JSONL store (e.g. after a crash) is ignored.
+    """
+    if not file_path.endswith(".jsonl"):
+        with open(file_path, "r", encoding="utf-8") as json_file:
+            return json.load(json_file)
+    return list(iter_jsonl(file_path))
+
+def iter_jsonl(file_path):
+    """
+    Stream the records of a JSONL store one line at a time.
+    """
+    with open(file_path, "r", encoding="utf-8") as jsonl_file:
+        for line in jsonl_file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                app_logger.warning(f"Skipping unreadable line in {file_path}")
+
+def get_journal_path(json_file_path):
+    """
+    Return the path of the progress journal kept next to a segmented JSON file.
+    """
+    base_name, _ = os.path.splitext(json_file_path)
+    return f"{base_name}_journal.jsonl"
+
+def load_journal(journal_path):
+    """
+    Read the set of processed counts from a progress journal.
+    A partially written last line (e.g. after a crash) is ignored.
+    """
+    processed_counts = set()
+    if not os.path.exists(journal_path):
+        return processed_counts
+    
+    with open(journal_path, "r", encoding="utf-8") as journal_file:
+        for line in journal_file:
+            try:
+                processed_counts.update(str(count) for count in json.loads(line))
+            except (json.JSONDecodeError, TypeError):
+                continue
+    return processed_counts
+
+def append_to_journal(journal_path, counts):
     """
-    # Create temporary file path
-    temp_file_path = f"{json_file_path}.tmp"
+    Append one line with the counts of a processed segment to the progress journal.
+    """
+    with open(journal_path, "a", encoding="utf-8") as journal_file:
+        journal_file.write(json.dumps(list(counts), ensure_ascii=False) + "\n")
+
+SEGMENT_HEADER = "```json\n{\n"
+SEGMENT_FOOTER = "}\n```"
+TOKEN_BATCH_SIZE = 1024
+
+def render_segment_line(count, value):
+    """Render one entry the way json.dumps(..., indent=4) does inside a segment."""
+    return f"    {json.dumps(count, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}"
+
+def pack_segments(entries, max_token, prompt_token_count, encoding_name=DEFAULT_ENCODING):
+    """
+    Pack entries into segments whose rendered form (see create_segment_output) stays within max_token.
+    
+    Each entry is tokenized once as a middle line ("...,\n") and once as a last line ("...\n").
+    The tokenizer's pre-split always breaks right after those newlines, so a segment's
+    token count is the header, footer and line counts added together, and the packing is
+    O(n) while matching the result of re-tokenizing the whole segment for every entry.
+    Lines are tokenized in batches of TOKEN_BATCH_SIZE.
+    
+    Parameters:
+    - entries: List of (index, count, value) tuples with count as a string
+    - max_token: Token budget for prompts plus segment
+    - prompt_token_count: Tokens already used by the prompts
+    - encoding_name: Tokenizer used for counting
     
-    # Read current JSON file
-    with open(json_file_path, "r", encoding="utf-8") as json_file:
-        cell_data = json.load(json_file)
+    Yields:
+    - (segment_dict, indices) for every segment, in order
+    """
+    frame_token_count = (
+        prompt_token_count
+        + num_tokens_from_string(SEGMENT_HEADER, encoding_name)
+        + num_tokens_from_string(SEGMENT_FOOTER, encoding_name)
+    )
     
-    # Filter out processed entries
-    updated_data = [cell for i, cell in enumerate(cell_data) if i not in processed_indices]
+    current_segment_dict = {}
+    current_indices = []
+    body_token_count = 0  # Tokens of the current lines, each rendered as a middle line
     
-    # Write to temporary file
-    with open(temp_file_path, "w", encoding="utf-8") as temp_file:
-        json.dump(updated_data, temp_file, ensure_ascii=False, indent=4)
+    for batch_start in range(0, len(entries), TOKEN_BATCH_SIZE):
+        batch = entries[batch_start:batch_start + TOKEN_BATCH_SIZE]
+        lines = [render_segment_line(count, value) for _, count, value in batch]
+        middle_line_tokens = count_tokens_batch([line + ",\n" for line in lines], encoding_name)
+        last_line_tokens = count_tokens_batch([line + "\n" for line in lines], encoding_name)
+        
+        for (i, count, value), middle_tokens, last_tokens in zip(batch, middle_line_tokens, last_line_tokens):
+            if count in current_segment_dict:
+                # A repeated count replaces its earlier line in place, so count the rendered segment directly
+                new_token_count = prompt_token_count + num_tokens_from_string(
+                    create_segment_output(current_segment_dict | {count: value}), encoding_name
+                )
+            else:
+                new_token_count = frame_token_count + body_token_count + last_tokens
+            
+            if new_token_count > max_token:
+                # If adding this line exceeds max_token, yield the current segment
+                if current_segment_dict:
+                    yield current_segment_dict, current_indices
+                
+                # Start a new segment with the current line
+                current_segment_dict = {count: value}
+                current_indices = [i]
+                body_token_count = middle_tokens
+            elif count in current_segment_dict:
+                current_segment_dict[count] = value
+                current_indices.append(i)
+                body_token_count = sum(
+                    num_tokens_from_string(render_segment_line(key, text) + ",\n", encoding_name)
+                    for key, text in current_segment_dict.items()
+                )
+            else:
+                # Add the current line to the segment
+                current_segment_dict[count] = value
+                current_indices.append(i)
+                body_token_count += middle_tokens
     
-    # Replace original file
-    shutil.move(temp_file_path, json_file_path)
+    # Yield the final segment
+    if current_segment_dict:
+        yield current_segment_dict, current_indices
 
 def create_segment_output(segment_dict):
     """
@@ -163,7 +224,7 @@ def calculate_progress(segment_dict, max_count):
     last_count = max(int(key) for key in segment_dict.keys())
     return last_count / max_count if max_count > 0 else 1.0
 
-def split_text_by_token_limit(file_path, max_tokens=256):
+def split_text_by_token_limit(file_path, max_tokens=256, encoding_name=DEFAULT_ENCODING):
     """
     Split long text items in JSON data into smaller chunks based on token limit
     while preserving complete sentences.
@@ -171,6 +232,7 @@ def split_text_by_token_limit(file_path, max_tokens=256):
     Parameters:
     - file_path: Path to the JSON file to process
     - max_tokens: Maximum number of tokens allowed per chunk (default: 256)
+    - encoding_name: Tokenizer used for counting
     
     Returns:
     - Path to the saved split JSON file
@@ -180,10 +242,10 @@ def split_text_by_token_limit(file_path, max_tokens=256):
         json_data = json.load(f)
     
     result = []
+    token_counts = count_tokens_batch([item["value"] for item in json_data], encoding_name)
     
-    for item in json_data:
+    for item, tokens in zip(json_data, token_counts):
         text = item["value"]
-        tokens = num_tokens_from_string(text)
         
         # If under token limit, add as is with original_count field
         if tokens <= max_tokens:
@@ -193,7 +255,7 @@ def split_text_by_token_limit(file_path, max_tokens=256):
             continue
         
         # For longer texts, split by complete sentences then recombine
-        chunks = split_by_sentences_and_combine(text, max_tokens)
+        chunks = split_by_sentences_and_combine(text, max_tokens, encoding_name)
         chunks_count = len(chunks)
         
         for i, chunk_text in enumerate(chunks):
@@ -222,6 +284,44 @@ def split_text_by_token_limit(file_path, max_tokens=256):
     
     return output_file_path
 
+def normalize_text(text):
+    """
+    Normalize a source value for comparison: NFC form, trimmed.
+    Inner whitespace and line breaks are kept, as a translation shared between entries
+    is copied verbatim and must fit the layout of each of them.
+    """
+    return unicodedata.normalize("NFC", text or "").strip()
+
+def deduplicate_entries(entries):
+    """
+    Collapse entries whose normalized value is identical, keeping the first one as representative.
+    
+    Parameters:
+    - entries: List of split JSON entries with "count" and "value"
+    
+    Returns:
+    - representatives: Entries that still need translating, in their original order
+    - duplicates: Dict mapping each representative count to the counts that share its value
+    """
+    representatives = []
+    duplicates = {}
+    representative_by_value = {}
+    
+    for entry in entries:
+        value = normalize_text(entry.get("value", ""))
+        if not value or entry.get("count") is None:
+            representatives.append(entry)
+            continue
+        
+        representative = representative_by_value.get(value)
+        if representative is None:
+            representative_by_value[value] = entry["count"]
+            representatives.append(entry)
+        else:
+            duplicates.setdefault(representative, []).append(entry["count"])
+    
+    return representatives, duplicates
+
 def split_into_sentences(text):
     """
     Split text into complete sentences, ensuring sentence endings stay with their content.
@@ -257,13 +357,13 @@ def split_into_sentences(text):
     # Filter out empty sentences
     return [s for s in sentences if s.strip()]
 
-def split_long_sentence(sentence, max_tokens):
+def split_long_sentence(sentence, max_tokens, encoding_name=DEFAULT_ENCODING):
     """
     Split an individual long sentence by commas or other internal punctuation
     if it exceeds the token limit.
     """
     # If the sentence is within limit, return it as is
-    if num_tokens_from_string(sentence) <= max_tokens:
+    if num_tokens_from_string(sentence, encoding_name) <= max_tokens:
         return [sentence]
     
     # Internal punctuation pattern (commas, semicolons, colons in both Chinese and English)
@@ -282,7 +382,7 @@ def split_long_sentence(sentence, max_tokens):
         punct = parts[i + 1] if i + 1 < len(parts) and re.match(internal_punct_pattern, parts[i + 1]) else ""
         
         part_with_punct = part + punct
-        part_tokens = num_tokens_from_string(part_with_punct)
+        part_tokens = num_tokens_from_string(part_with_punct, encoding_name)
         
         # If adding this part would exceed the limit
         if current_tokens + part_tokens > max_tokens:
@@ -293,8 +393,8 @@ def split_long_sentence(sentence, max_tokens):
             # If this single part exceeds the limit, we need to split it by characters
             if part_tokens > max_tokens:
                 # Split the part itself by characters up to token limit
-                encoding = tiktoken.get_encoding("cl100k_base")
-                encoded_part = encoding.encode(part_with_punct)
+                encoding = get_encoder(encoding_name)
+                encoded_part = encoding.encode_ordinary(part_with_punct)
                 
                 for j in range(0, len(encoded_part), max_tokens):
                     end_idx = min(j + max_tokens, len(encoded_part))
@@ -316,7 +416,7 @@ def split_long_sentence(sentence, max_tokens):
     
     return chunks
 
-def split_by_sentences_and_combine(text, max_tokens):
+def split_by_sentences_and_combine(text, max_tokens, encoding_name=DEFAULT_ENCODING):
     """
     Split text into sentences, then combine sentences up to the token limit.
     If a single sentence exceeds the limit, split it at internal punctuation.
@@ -329,7 +429,7 @@ def split_by_sentences_and_combine(text, max_tokens):
     current_tokens = 0
     
     for sentence in sentences:
-        sentence_tokens = num_tokens_from_string(sentence)
+        sentence_tokens = num_tokens_from_string(sentence, encoding_name)
         
         # If a single sentence exceeds the limit, we need to split it
         if sentence_tokens > max_tokens:
@@ -340,7 +440,7 @@ def split_by_sentences_and_combine(text, max_tokens):
                 current_tokens = 0
             
             # Then split the long sentence and add its parts
-            sentence_parts = split_long_sentence(sentence, max_tokens)
+            sentence_parts = split_long_sentence(sentence, max_tokens, encoding_name)
             chunks.extend(sentence_parts)
             continue
         
@@ -384,8 +484,7 @@ def recombine_split_jsons(src_split_path, dst_translated_split_path):
         src_data = []
     
     try:
-        with open(dst_translated_split_path, 'r', encoding='utf-8') as f:
-            translated_data = json.load(f)
+        translated_data = load_json_records(dst_translated_split_path)
     except Exception as e:
         print(f"Error loading translated file: {e}")
         translated_data = []
@@ -491,7 +590,7 @@ def recombine_split_jsons(src_split_path, dst_translated_split_path):
     # Generate output path
     dir_path = os.path.dirname(dst_translated_split_path)
     base_name = os.path.basename(dst_translated_split_path)
-    file_name = base_name.replace("_split", "")
+    file_name = base_name.replace("_split", "").replace(".jsonl", ".json")
     output_path = os.path.join(dir_path, file_name)
     
     # Save result
@@ -500,9 +599,8 @@ def recombine_split_jsons(src_split_path, dst_translated_split_path):
     
     return output_path
 
-def num_tokens_from_string(string):
+def num_tokens_from_string(string, encoding_name=DEFAULT_ENCODING):
     """
     Calculate the number of tokens in a text string.
     """
-    encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(string))
\ No newline at end of file
+    return count_tokens(string, encoding_name)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import functools
+import os
+import threading
+from collections import OrderedDict
+import tiktoken
+from tiktoken_ext import openai_public
+import tiktoken_ext
+from config.log_config import app_logger
+from config.load_config import load_json_config
+
+DEFAULT_ENCODING = "cl100k_base"
+MODEL_CONFIG_DIR = os.path.join("config", "api_config")
+TOKEN_COUNT_CACHE_SIZE = 16384
+BATCH_THREADS = 8
+
+_count_lock = threading.Lock()
+_token_counts = OrderedDict()  # (encoding_name, text) -> token count, least recently used first
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(encoding_name=DEFAULT_ENCODING):
+    """
+    Return the tiktoken encoder for encoding_name, loading it only once.
+    Unknown names fall back to the default encoding.
+    """
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except (KeyError, ValueError) as e:
+        if encoding_name == DEFAULT_ENCODING:
+            raise
+        app_logger.warning(f"Unknown tokenizer '{encoding_name}' ({e}), using {DEFAULT_ENCODING}")
+        return get_encoder(DEFAULT_ENCODING)
+
+
+def get_model_encoding(model):
+    """
+    Return the tokenizer declared for a model in config/api_config/<model>.json ("tokenizer"),
+    or the default encoding when the model has no config or declares none (e.g. Ollama models).
+    """
+    if not model:
+        return DEFAULT_ENCODING
+    model_config = load_json_config(os.path.join(MODEL_CONFIG_DIR, f"{model}.json")) or {}
+    return model_config.get("tokenizer") or DEFAULT_ENCODING
+
+
+def _cached_count(key):
+    """Return the remembered count for key, or None."""
+    with _count_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+        return count
+
+
+def _store_counts(items):
+    """Remember (key, count) pairs, dropping the least recently used past TOKEN_COUNT_CACHE_SIZE."""
+    with _count_lock:
+        for key, count in items:
+            _token_counts[key] = count
+            _token_counts.move_to_end(key)
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+
+
+def clear_token_count_cache():
+    """Forget every remembered token count."""
+    with _count_lock:
+        _token_counts.clear()
+
+
+def count_tokens(text, encoding_name=DEFAULT_ENCODING):
+    """Count the tokens of a string, remembering the counts of recently seen strings."""
+    key = (encoding_name, text)
+    count = _cached_count(key)
+    if count is None:
+        count = len(get_encoder(encoding_name).encode_ordinary(text))
+        _store_counts([(key, count)])
+    return count
+
+
+def encode_batch(texts, encoding_name=DEFAULT_ENCODING):
+    """Encode many strings at once on tiktoken's native thread pool."""
+    return get_encoder(encoding_name).encode_ordinary_batch(list(texts), num_threads=BATCH_THREADS)
+
+
+def count_tokens_batch(texts, encoding_name=DEFAULT_ENCODING):
+    """
+    Count the tokens of many strings at once, sharing the count_tokens cache.
+    Only the strings not already cached are encoded, in a single batch.
+    """
+    texts = list(texts)
+    counts = [_cached_count((encoding_name, text)) for text in texts]
+    missing = list(dict.fromkeys(text for text, count in zip(texts, counts) if count is None))
+    if missing:
+        fresh = {text: len(tokens) for text, tokens in zip(missing, encode_batch(missing, encoding_name))}
+        _store_counts(((encoding_name, text), count) for text, count in fresh.items())
+        counts = [fresh[text] if count is None else count for text, count in zip(texts, counts)]
+    return counts
@@ -1,6 +1,8 @@
 import os
 import json
-from peewee import Model, SqliteDatabase, AutoField, CharField, TextField, SQL
+import sqlite3
+import threading
+from peewee import Model, SqliteDatabase, AutoField, CharField, TextField, SQL, Case, chunked, fn
 from typing import Optional
 import glob
 import uuid
@@ -8,6 +10,19 @@ import uuid
 # we don't init the database here
 db = SqliteDatabase(None)
 
+# Rows stored by TranslationCache.set are inserted in one transaction once this many are pending,
+# or earlier when flush() is called (after every page)
+WRITE_BEHIND_ROWS = 256
+# Rows per INSERT / UPDATE statement, keeping the bound variables below SQLite's limit of 999
+INSERT_BATCH_ROWS = 200
+UPDATE_BATCH_ROWS = 300
+
+DB_PRAGMAS = {
+    "journal_mode": "wal",  # Enable write-ahead logging
+    "synchronous": "normal",  # With WAL, only checkpoints wait for fsync
+    "busy_timeout": 1000,   # Wait if database is busy
+}
+
 def display_database():
     data = [
         {
@@ -64,6 +79,9 @@ class TranslationCache:
         ), "current cache require translate engine name less than 20 characters"
         self.translate_engine = translate_engine
         self.replace_params(translate_engine_params)
+        # (translate_engine_params, original_text) -> translation, in the order they were set
+        self._pending = {}
+        self._pending_lock = threading.Lock()
 
     # The program typically starts multi-threaded translation
     # only after cache parameters are fully configured,
@@ -86,8 +104,12 @@ class TranslationCache:
         self.replace_params(self.params)
 
     # Since peewee and the underlying sqlite are thread-safe,
-    # get and set operations don't need locks.
+    # only the pending rows need a lock.
     def get(self, original_text: str) -> Optional[str]:
+        with self._pending_lock:
+            pending = self._pending.get((self.translate_engine_params, original_text))
+        if pending is not None:
+            return pending
         result = _TranslationCache.get_or_none(
             translate_engine=self.translate_engine,
             translate_engine_params=self.translate_engine_params,
@@ -96,15 +118,38 @@ class TranslationCache:
         return result.translation if result else None
 
     def set(self, original_text: str, translation: str):
-        _TranslationCache.create(
-            translate_engine=self.translate_engine,
-            translate_engine_params=self.translate_engine_params,
-            original_text=original_text,
-            translation=translation,
-        )
+        key = (self.translate_engine_params, original_text)
+        with self._pending_lock:
+            # Setting a text again moves it to the end, like the table's ON CONFLICT REPLACE
+            self._pending.pop(key, None)
+            self._pending[key] = translation
+            full = len(self._pending) >= WRITE_BEHIND_ROWS
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Insert the pending rows in one transaction, keeping their order (and so their ids)."""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            rows = [
+                {
+                    "translate_engine": self.translate_engine,
+                    "translate_engine_params": translate_engine_params,
+                    "original_text": original_text,
+                    "translation": translation,
+                }
+                for (translate_engine_params, original_text), translation in self._pending.items()
+            ]
+            # The rows leave _pending only once they are committed, so get() always finds them
+            with db.atomic():
+                for batch in chunked(rows, INSERT_BATCH_ROWS):
+                    _TranslationCache.insert_many(batch).execute()
+            self._pending.clear()
 
     # New method to extract all ids and original_text and save to JSON
     def export_translation_to_json(self,output_path):
+        self.flush()
         data = [
             {"count": record.id, "value": record.original_text}
             for record in _TranslationCache.select(_TranslationCache.id, _TranslationCache.original_text).order_by(_TranslationCache.id)
@@ -114,12 +159,16 @@ class TranslationCache:
 
     # New method to update translations from a JSON file
     def update_translations_from_json(self,input_path):
+        self.flush()
         with open(input_path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        for item in data:
-            count = int(item["count"])
-            translated = item["translated"]
-            _TranslationCache.update(translation=translated).where(_TranslationCache.id == count).execute()
+        # The last translation of a count wins, as with one UPDATE per item
+        translations = {int(item["count"]): item["translated"] for item in data}
+        with db.atomic():
+            for batch in chunked(list(translations.items()), UPDATE_BATCH_ROWS):
+                _TranslationCache.update(
+                    translation=Case(_TranslationCache.id, batch)
+                ).where(_TranslationCache.id.in_([count for count, _ in batch])).execute()
         # display_database()
     
 def generate_db_name():
@@ -127,8 +176,9 @@ def generate_db_name():
     random_id = str(uuid.uuid4())[:8]  # Use first 8 characters of UUID
     return f"cache.v1.{random_id}.db"
 
-def init_db(remove_exists=False):
-    cache_folder = os.path.join(os.path.expanduser("~"), ".cache", "pdf2zh")
+def init_db(remove_exists=False, cache_folder=None):
+    if cache_folder is None:
+        cache_folder = os.path.join(os.path.expanduser("~"), ".cache", "pdf2zh")
     os.makedirs(cache_folder, exist_ok=True)
 
     # Generate new database name with random string
@@ -139,17 +189,68 @@ def init_db(remove_exists=False):
         clean_all_dbs(cache_folder)
 
     # Initialize new database
-    db.init(
-        cache_db_path,
-        pragmas={
-            "journal_mode": "wal",  # Enable write-ahead logging
-            "busy_timeout": 1000,   # Wait if database is busy
-        },
-    )
+    db.init(cache_db_path, pragmas=DB_PRAGMAS)
     db.create_tables([_TranslationCache], safe=True)
     return cache_db_path,cache_folder
 
 
+def init_db_copy(source_db_path, cache_folder):
+    """
+    Initialize the database as a private copy of source_db_path, for a worker process
+    that must not share the job's connection. Returns the path of the copy.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    cache_db_path = os.path.join(cache_folder, generate_db_name())
+
+    source = sqlite3.connect(source_db_path)
+    target = sqlite3.connect(cache_db_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+    db.init(cache_db_path, pragmas=DB_PRAGMAS)
+    db.create_tables([_TranslationCache], safe=True)
+    return cache_db_path
+
+
+def get_last_row_id():
+    """Return the id of the newest row, 0 for an empty database."""
+    return _TranslationCache.select(fn.MAX(_TranslationCache.id)).scalar() or 0
+
+
+def export_rows(after_id=0):
+    """Return the rows added after after_id, in insertion order."""
+    return [
+        (record.translate_engine, record.translate_engine_params, record.original_text, record.translation)
+        for record in _TranslationCache.select()
+        .where(_TranslationCache.id > after_id)
+        .order_by(_TranslationCache.id)
+    ]
+
+
+def import_rows(rows):
+    """
+    Add rows exported from another database in their order. Texts that are already
+    cached keep their row, as BaseTranslator.translate only adds texts it has not seen.
+    """
+    with db.atomic():
+        for translate_engine, translate_engine_params, original_text, translation in rows:
+            exists = _TranslationCache.get_or_none(
+                translate_engine=translate_engine,
+                translate_engine_params=translate_engine_params,
+                original_text=original_text,
+            )
+            if exists is None:
+                _TranslationCache.create(
+                    translate_engine=translate_engine,
+                    translate_engine_params=translate_engine_params,
+                    original_text=original_text,
+                    translation=translation,
+                )
+
+
 def clean_all_dbs(cache_folder):
     """Clean all database files in the cache folder"""
     # Close any existing connections
@@ -196,13 +297,7 @@ def init_test_db():
     import tempfile
 
     cache_db_path = tempfile.mktemp(suffix=".db")
-    test_db = SqliteDatabase(
-        cache_db_path,
-        pragmas={
-            "journal_mode": "wal",
-            "busy_timeout": 1000,
-        },
-    )
+    test_db = SqliteDatabase(cache_db_path, pragmas=DB_PRAGMAS)
     test_db.bind([_TranslationCache], bind_refs=False, bind_backrefs=False)
     test_db.connect()
     test_db.create_tables([_TranslationCache], safe=True)
@@ -365,8 +365,6 @@ class TranslateConverter(PDFConverterEx):
             max_workers=self.thread
         ) as executor:
             news = list(executor.map(worker, sstk))
-        
-        self.translator.process_translation_cache()
 
         ############################################################
         # C. 新文档排版
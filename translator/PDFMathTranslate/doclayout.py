@@ -10,24 +10,25 @@ import os
 
 class DocLayoutModel(abc.ABC):
     @staticmethod
-    def load_onnx(local_onnx_path: str):
+    def load_onnx(local_onnx_path: str, **session_options):
         """
         Load the ONNX model from a local file.
         
         Args:
             local_onnx_path (str): Path to the local ONNX model.
+            **session_options: intra_op_num_threads / inter_op_num_threads of the inference session.
         """
-        model = OnnxModel.from_local_file(local_onnx_path)
+        model = OnnxModel.from_local_file(local_onnx_path, **session_options)
         return model
 
     @staticmethod
-    def load_available():
+    def load_available(**session_options):
         """
         Default method to load a local model.
         You can modify the path to match your local ONNX file location.
         """
         local_path = "./models/doclayout_yolo_docstructbench_imgsz1024.onnx"
-        return DocLayoutModel.load_onnx(local_path)
+        return DocLayoutModel.load_onnx(local_path, **session_options)
 
     @property
     @abc.abstractmethod
@@ -68,7 +69,7 @@ class YoloBox:
 
 class OnnxModel(DocLayoutModel):
 
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, intra_op_num_threads: int = 0, inter_op_num_threads: int = 0):
         self.model_path = model_path
 
         model = onnx.load(model_path)
@@ -76,17 +77,32 @@ class OnnxModel(DocLayoutModel):
         self._stride = ast.literal_eval(metadata["stride"])
         self._names = ast.literal_eval(metadata["names"])
 
-        self.model = onnxruntime.InferenceSession(model.SerializeToString())
+        # 0 keeps onnxruntime's default thread counts
+        self.session_options = {
+            "intra_op_num_threads": intra_op_num_threads,
+            "inter_op_num_threads": inter_op_num_threads,
+        }
+        options = onnxruntime.SessionOptions()
+        if intra_op_num_threads > 0:
+            options.intra_op_num_threads = intra_op_num_threads
+        if inter_op_num_threads > 0:
+            options.inter_op_num_threads = inter_op_num_threads
+        self.model = onnxruntime.InferenceSession(model.SerializeToString(), sess_options=options)
+
+        # A model exported with a fixed batch size of 1 gets one page per run
+        batch_dim = self.model.get_inputs()[0].shape[0]
+        self._batchable = not isinstance(batch_dim, int) or batch_dim > 1
 
     @staticmethod
-    def from_local_file(local_path: str):
+    def from_local_file(local_path: str, **session_options):
         """
         Load the ONNX model from a local file (no remote download).
         
         Args:
             local_path (str): Local path to the ONNX model file.
+            **session_options: intra_op_num_threads / inter_op_num_threads of the inference session.
         """
-        return OnnxModel(local_path)
+        return OnnxModel(local_path, **session_options)
 
     @property
     def stride(self):
@@ -159,23 +175,49 @@ class OnnxModel(DocLayoutModel):
         return boxes
 
     def predict(self, image, imgsz=1024, **kwargs):
-        # Preprocess input image
-        orig_h, orig_w = image.shape[:2]
-        pix = self.resize_and_pad_image(image, new_shape=imgsz)
-        pix = np.transpose(pix, (2, 0, 1))  # CHW
-        pix = np.expand_dims(pix, axis=0)  # BCHW
-        pix = pix.astype(np.float32) / 255.0  # Normalize to [0, 1]
-        new_h, new_w = pix.shape[2:]
-
-        # Run inference
-        preds = self.model.run(None, {"images": pix})[0]
-
-        # Postprocess predictions
-        preds = preds[preds[..., 4] > 0.25]
-        preds[..., :4] = self.scale_boxes(
-            (new_h, new_w), preds[..., :4], (orig_h, orig_w)
-        )
-        return [YoloResult(boxes=preds, names=self._names)]
+        return self.predict_batch([image], imgsz)
+
+    def predict_batch(self, images, imgsz=1024, **kwargs):
+        """
+        Predict the layouts of several document pages, one YoloResult per image.
+        Pages whose inputs end up the same shape after resizing share one inference run.
+
+        Args:
+            images: The images of the document pages.
+            imgsz: One size for every image, or a list with one size per image.
+        """
+        if isinstance(imgsz, int):
+            imgsz = [imgsz] * len(images)
+
+        # Preprocess input images
+        inputs = []
+        for image, size in zip(images, imgsz):
+            pix = self.resize_and_pad_image(image, new_shape=size)
+            pix = np.transpose(pix, (2, 0, 1))  # CHW
+            pix = pix.astype(np.float32) / 255.0  # Normalize to [0, 1]
+            inputs.append(pix)
+
+        groups = {}
+        for i, pix in enumerate(inputs):
+            groups.setdefault(pix.shape, []).append(i)
+
+        results = [None] * len(images)
+        for (_, new_h, new_w), indices in groups.items():
+            # Run inference
+            if self._batchable:
+                batch_preds = self.model.run(None, {"images": np.stack([inputs[i] for i in indices])})[0]
+            else:
+                batch_preds = [self.model.run(None, {"images": inputs[i][None]})[0][0] for i in indices]
+
+            # Postprocess predictions
+            for i, preds in zip(indices, batch_preds):
+                orig_h, orig_w = images[i].shape[:2]
+                preds = preds[preds[..., 4] > 0.25]
+                preds[..., :4] = self.scale_boxes(
+                    (new_h, new_w), preds[..., :4], (orig_h, orig_w)
+                )
+                results[i] = YoloResult(boxes=preds, names=self._names)
+        return results
 
 
 class ModelInstance:
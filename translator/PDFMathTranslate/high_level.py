@@ -1,14 +1,22 @@
 """Functions that can be used for the most common use-cases for pdf2zh.six"""
 
 import asyncio
+import hashlib
 import io
+import logging
+import math
+import multiprocessing
 import os
+import shutil
 import sys
 import tempfile
 import urllib.request
 from asyncio import CancelledError
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import closing
+from functools import partial
 from pathlib import Path
-from typing import Any, BinaryIO, List, Optional, Dict
+from typing import Any, BinaryIO, Callable, List, Optional, Dict
 
 import numpy as np
 import requests
@@ -20,12 +28,24 @@ from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFParser
 from pymupdf import Document, Font
 
+from .cache import db, export_rows, get_last_row_id, import_rows, init_db_copy
 from .converter import TranslateConverter
 from .doclayout import OnnxModel
+from .layout_cache import load_page_layouts, save_page_layout
+from .layout_prefetch import LayoutPrefetcher
 from .pdfinterp import PDFPageInterpreterEx
+from . import shared_constants
 
 NOTO_NAME = "noto"
 
+# Page workers interpret runs of at least this many pages; smaller documents stay serial
+PAGE_SHARD_MIN_PAGES = 8
+PAGE_SHARDS_PER_WORKER = 4
+# Folder next to the job's cache database holding the workers' copies of it
+PAGE_WORKER_DB_DIR = "page_workers"
+
+log = logging.getLogger(__name__)
+
 noto_list = [
     "am",  # Amharic
     "ar",  # Arabic
@@ -60,6 +80,270 @@ def check_files(files: List[str]) -> List[str]:
     return missing_files
 
 
+LAYOUT_SKIP_CLASSES = ["abandon", "figure", "table", "isolate_formula", "formula_caption"]
+
+
+def build_layout_mask(page_boxes, h, w):
+    """
+    Paint the page's boxes into a class map: 1 is plain text, i + 2 is box i, 0 is not translated.
+    The map uses the smallest unsigned dtype that holds every label (uint8 for up to 253 boxes),
+    so a page costs one byte per pixel.
+    """
+    # kdtree 是不可能 kdtree 的，不如直接渲染成图片，用空间换时间
+    box = np.ones((h, w), dtype=np.min_scalar_type(len(page_boxes) + 1))
+    for i, (name, xyxy) in enumerate(page_boxes):
+        if name not in LAYOUT_SKIP_CLASSES:
+            x0, y0, x1, y1 = xyxy
+            x0, y0, x1, y1 = (
+                np.clip(int(x0 - 1), 0, w - 1),
+                np.clip(int(h - y1 - 1), 0, h - 1),
+                np.clip(int(x1 + 1), 0, w - 1),
+                np.clip(int(h - y0 + 1), 0, h - 1),
+            )
+            box[y0:y1, x0:x1] = i + 2
+    for i, (name, xyxy) in enumerate(page_boxes):
+        if name in LAYOUT_SKIP_CLASSES:
+            x0, y0, x1, y1 = xyxy
+            x0, y0, x1, y1 = (
+                np.clip(int(x0 - 1), 0, w - 1),
+                np.clip(int(h - y1 - 1), 0, h - 1),
+                np.clip(int(x1 + 1), 0, w - 1),
+                np.clip(int(h - y0 + 1), 0, h - 1),
+            )
+            box[y0:y1, x0:x1] = 0
+    return box
+
+
+def interpret_pages(
+    inf: BinaryIO,
+    device: TranslateConverter,
+    page_xrefs: Dict[int, int],
+    cached_layouts: Dict,
+    model: OnnxModel,
+    save_layout: Callable,
+    progress: tqdm.tqdm = None,
+    callback: object = None,
+    cancellation_event: asyncio.Event = None,
+) -> Dict:
+    """
+    Interpret the pages of page_xrefs ({pageno: xref of the page's new content stream}) in order
+    and return their obj_patch. Layouts missing from cached_layouts are inferred with the model
+    and handed to save_layout(pageno, h, w, page_boxes).
+    """
+    layout = device.layout
+    obj_patch = {}
+    interpreter = PDFPageInterpreterEx(device.rsrcmgr, device, obj_patch)
+
+    # Pages without a cached layout are rendered and analysed ahead of the interpreter
+    prefetcher = LayoutPrefetcher(
+        inf.getvalue(),
+        [pageno for pageno in page_xrefs if pageno not in cached_layouts],
+        model,
+    )
+    last_pageno = max(page_xrefs, default=-1)
+
+    parser = PDFParser(inf)
+    doc = PDFDocument(parser)
+    with closing(prefetcher):
+        for pageno, page in enumerate(PDFPage.create_pages(doc)):
+            if pageno > last_pageno:
+                break
+            if cancellation_event and cancellation_event.is_set():
+                raise CancelledError("task cancelled")
+            if pageno not in page_xrefs:
+                continue
+            if progress is not None:
+                progress.update()
+                if callback:
+                    callback(progress)
+            page.pageno = pageno
+            if page.pageno in cached_layouts:
+                # Reuse the layout found for this page in the extract pass
+                h, w, page_boxes = cached_layouts[page.pageno]
+            else:
+                h, w, page_layout = prefetcher.get(page.pageno)
+                page_boxes = [
+                    (page_layout.names[int(d.cls)], d.xyxy.squeeze())
+                    for d in page_layout.boxes
+                ]
+                save_layout(page.pageno, h, w, page_boxes)
+            layout[page.pageno] = build_layout_mask(page_boxes, h, w)
+            page.page_xref = page_xrefs[page.pageno]
+            interpreter.process_page(page)
+            # The page's characters have been classified, its mask is no longer needed
+            del layout[page.pageno]
+            # One transaction for the texts the page added to the cache
+            device.translator.cache.flush()
+    return obj_patch
+
+
+def get_page_shards(pagenos: List[int], page_workers: int) -> List[List[int]]:
+    """
+    Split the pages into runs of consecutive pages for the page workers. A single shard
+    means serial interpretation: one worker or too few pages.
+    """
+    if page_workers <= 1 or len(pagenos) < 2 * PAGE_SHARD_MIN_PAGES:
+        return [pagenos]
+    # Several shards per worker, so that workers finishing early pick up more pages
+    size = max(PAGE_SHARD_MIN_PAGES, math.ceil(len(pagenos) / (page_workers * PAGE_SHARDS_PER_WORKER)))
+    return [pagenos[i:i + size] for i in range(0, len(pagenos), size)]
+
+
+# State of a page worker process, set up once by _init_page_worker
+_page_worker = {}
+
+
+def _init_page_worker(pdf_bytes, model, session_options, font_path, converter_args, cache_db_path, worker_db_dir, work_dir):
+    # A spawned worker starts from fresh modules, without the job's settings
+    shared_constants.PDF_WORK_DIR = work_dir
+    if isinstance(model, str):
+        # The ONNX model comes as its file path; the worker needs an inference session of its own
+        model = OnnxModel.from_local_file(model, **session_options)
+    init_db_copy(cache_db_path, worker_db_dir)
+    device = TranslateConverter(
+        PDFResourceManager(),
+        layout={},
+        noto=Font(converter_args["noto_name"], font_path),
+        **converter_args,
+    )
+    _page_worker.update(
+        pdf_bytes=pdf_bytes,
+        model=model,
+        device=device,
+        last_row_id=get_last_row_id(),
+    )
+
+
+def _interpret_page_shard(page_xrefs, cached_layouts):
+    """Interpret one shard in a page worker; returns its obj_patch, new layouts and new cache rows."""
+    new_layouts = []
+    obj_patch = interpret_pages(
+        io.BytesIO(_page_worker["pdf_bytes"]),
+        _page_worker["device"],
+        page_xrefs,
+        cached_layouts,
+        _page_worker["model"],
+        lambda *page_layout: new_layouts.append(page_layout),
+    )
+    rows = export_rows(_page_worker["last_row_id"])
+    _page_worker["last_row_id"] = get_last_row_id()
+    return obj_patch, new_layouts, rows
+
+
+def _get_page_worker_context():
+    """
+    The app runs Gradio, translation and layout prefetch threads, and a child forked from it
+    while one of them holds a lock (logging, onnxruntime) can deadlock. Workers fork from a
+    single-threaded fork server instead, which has imported this module once; where there is
+    none they are spawned. Either way a worker imports the entry script again, so everything
+    beyond imports and definitions must stay under its ``if __name__ == "__main__"`` guard.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["__main__", __name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _terminate_page_workers(executor):
+    # ProcessPoolExecutor only has a public way to do this from Python 3.14 on
+    terminate_workers = getattr(executor, "terminate_workers", None)
+    if terminate_workers:
+        terminate_workers()
+        return
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+
+
+def interpret_pages_parallel(
+    inf: BinaryIO,
+    shards: List[List[int]],
+    page_xrefs: Dict[int, int],
+    cached_layouts: Dict,
+    model: OnnxModel,
+    page_workers: int,
+    font_path: str,
+    converter_args: Dict,
+    doc_hash: str = None,
+    progress: tqdm.tqdm = None,
+    callback: object = None,
+    cancellation_event: asyncio.Event = None,
+) -> Dict:
+    """
+    Interpret the shards in a pool of worker processes, each with its own resource manager,
+    converter, layout model and copy of the translation cache. The results are merged in page
+    order, so obj_patch, the cache rows and their ids come out as in a serial run.
+
+    The workers are not forked from this process (see _get_page_worker_context), and a
+    cancelled or failed job terminates them instead of waiting for their running shards.
+    """
+    page_workers = min(page_workers, len(shards))
+    cache_db_path = db.database
+    worker_db_dir = os.path.join(os.path.dirname(cache_db_path), PAGE_WORKER_DB_DIR)
+    needs_model = any(pageno not in cached_layouts for pageno in page_xrefs)
+    session_options = dict(getattr(model, "session_options", {}))
+    # Share the cores between the workers unless the thread count is configured
+    session_options["intra_op_num_threads"] = session_options.get("intra_op_num_threads") or max(1, (os.cpu_count() or 1) // page_workers)
+    if not needs_model:
+        model = None
+    elif isinstance(model, OnnxModel):
+        model = model.model_path
+    initargs = (
+        inf.getvalue(),
+        model,
+        session_options,
+        font_path,
+        converter_args,
+        cache_db_path,
+        worker_db_dir,
+        shared_constants.PDF_WORK_DIR,
+    )
+
+    results = [None] * len(shards)
+    executor = ProcessPoolExecutor(
+        max_workers=page_workers,
+        mp_context=_get_page_worker_context(),
+        initializer=_init_page_worker,
+        initargs=initargs,
+    )
+    try:
+        futures = {
+            executor.submit(
+                _interpret_page_shard,
+                {pageno: page_xrefs[pageno] for pageno in shard},
+                {pageno: cached_layouts[pageno] for pageno in shard if pageno in cached_layouts},
+            ): index
+            for index, shard in enumerate(shards)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            if cancellation_event and cancellation_event.is_set():
+                raise CancelledError("task cancelled")
+            for future in done:
+                index = futures[future]
+                results[index] = future.result()
+                if progress is not None:
+                    progress.update(len(shards[index]))
+                    if callback:
+                        callback(progress)
+    except BaseException:
+        _terminate_page_workers(executor)
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(worker_db_dir, ignore_errors=True)
+
+    # Later pages overwrite the patches of shared objects, as in a serial run
+    obj_patch = {}
+    for shard_patch, new_layouts, rows in results:
+        obj_patch.update(shard_patch)
+        import_rows(rows)
+        for page_layout in new_layouts:
+            save_page_layout(doc_hash, *page_layout)
+    return obj_patch
+
+
 def translate_patch(
     inf: BinaryIO,
     pages: Optional[list[int]] = None,
@@ -77,10 +361,14 @@ def translate_patch(
     model: OnnxModel = None,
     envs: Dict = None,
     prompt: List = None,
+    doc_hash: str = None,
+    page_workers: int = 1,
+    font_path: str = None,
     **kwarg: Any,
 ) -> None:
     rsrcmgr = PDFResourceManager()
     layout = {}
+    cached_layouts = load_page_layouts(doc_hash)
     device = TranslateConverter(
         rsrcmgr,
         vfont,
@@ -97,62 +385,67 @@ def translate_patch(
     )
 
     assert device is not None
-    obj_patch = {}
-    interpreter = PDFPageInterpreterEx(rsrcmgr, device, obj_patch)
     if pages:
         total_pages = len(pages)
     else:
         total_pages = doc_zh.page_count
 
-    parser = PDFParser(inf)
-    doc = PDFDocument(parser)
+    pagenos = [
+        pageno
+        for pageno in range(doc_zh.page_count)
+        if not pages or pageno in pages
+    ]
+    page_xrefs = {}
+    for pageno in pagenos:
+        # 新建一个 xref 存放新指令流
+        page_xref = doc_zh.get_new_xref()  # hack 插入页面的新 xref
+        doc_zh.update_object(page_xref, "<<>>")
+        doc_zh.update_stream(page_xref, b"")
+        doc_zh[pageno].set_contents(page_xref)
+        page_xrefs[pageno] = page_xref
+
+    shards = get_page_shards(pagenos, page_workers)
     with tqdm.tqdm(total=total_pages) as progress:
-        for pageno, page in enumerate(PDFPage.create_pages(doc)):
-            if cancellation_event and cancellation_event.is_set():
-                raise CancelledError("task cancelled")
-            if pages and (pageno not in pages):
-                continue
-            progress.update()
-            if callback:
-                callback(progress)
-            page.pageno = pageno
-            pix = doc_zh[page.pageno].get_pixmap()
-            image = np.fromstring(pix.samples, np.uint8).reshape(
-                pix.height, pix.width, 3
-            )[:, :, ::-1]
-            page_layout = model.predict(image, imgsz=int(pix.height / 32) * 32)[0]
-            # kdtree 是不可能 kdtree 的，不如直接渲染成图片，用空间换时间
-            box = np.ones((pix.height, pix.width))
-            h, w = box.shape
-            vcls = ["abandon", "figure", "table", "isolate_formula", "formula_caption"]
-            for i, d in enumerate(page_layout.boxes):
-                if page_layout.names[int(d.cls)] not in vcls:
-                    x0, y0, x1, y1 = d.xyxy.squeeze()
-                    x0, y0, x1, y1 = (
-                        np.clip(int(x0 - 1), 0, w - 1),
-                        np.clip(int(h - y1 - 1), 0, h - 1),
-                        np.clip(int(x1 + 1), 0, w - 1),
-                        np.clip(int(h - y0 + 1), 0, h - 1),
-                    )
-                    box[y0:y1, x0:x1] = i + 2
-            for i, d in enumerate(page_layout.boxes):
-                if page_layout.names[int(d.cls)] in vcls:
-                    x0, y0, x1, y1 = d.xyxy.squeeze()
-                    x0, y0, x1, y1 = (
-                        np.clip(int(x0 - 1), 0, w - 1),
-                        np.clip(int(h - y1 - 1), 0, h - 1),
-                        np.clip(int(x1 + 1), 0, w - 1),
-                        np.clip(int(h - y0 + 1), 0, h - 1),
-                    )
-                    box[y0:y1, x0:x1] = 0
-            layout[page.pageno] = box
-            # 新建一个 xref 存放新指令流
-            page.page_xref = doc_zh.get_new_xref()  # hack 插入页面的新 xref
-            doc_zh.update_object(page.page_xref, "<<>>")
-            doc_zh.update_stream(page.page_xref, b"")
-            doc_zh[page.pageno].set_contents(page.page_xref)
-            interpreter.process_page(page)
-
+        if len(shards) > 1:
+            obj_patch = interpret_pages_parallel(
+                inf,
+                shards,
+                page_xrefs,
+                cached_layouts,
+                model,
+                page_workers,
+                font_path,
+                {
+                    "vfont": vfont,
+                    "vchar": vchar,
+                    "thread": thread,
+                    "lang_in": lang_in,
+                    "lang_out": lang_out,
+                    "service": service,
+                    "noto_name": noto_name,
+                    "envs": envs,
+                    "prompt": prompt,
+                },
+                doc_hash,
+                progress,
+                callback,
+                cancellation_event,
+            )
+        else:
+            obj_patch = interpret_pages(
+                inf,
+                device,
+                page_xrefs,
+                cached_layouts,
+                model,
+                partial(save_page_layout, doc_hash),
+                progress,
+                callback,
+                cancellation_event,
+            )
+
+    # Export the texts found in the document for translation
+    device.translator.process_translation_cache()
     device.close()
     return obj_patch
 
@@ -171,9 +464,12 @@ def translate_stream(
     model: OnnxModel = None,
     envs: Dict = None,
     prompt: List = None,
+    page_workers: int = 1,
     **kwarg: Any,
 ):
     font_list = [("tiro", None)]
+    # Identifies the document in the layout cache
+    doc_hash = hashlib.sha256(stream).hexdigest()
 
     font_path = download_remote_fonts(lang_out.lower())
     noto_name = NOTO_NAME
@@ -405,6 +701,7 @@ def extract_and_translate(
     model: OnnxModel = None,
     envs: Dict = None,
     prompt: List = None,
+    page_workers: int = 1,
 ):
     """
     提取PDF内容并翻译，将翻译结果保存为JSON文件。
@@ -422,6 +719,7 @@ def extract_and_translate(
         model: 识别模型。
         envs: 翻译服务相关的环境变量。
         prompt: 翻译提示模板。
+        page_workers: 并行解析页面的进程数，1 为串行。
     """
     doc_raw = open(input_file, "rb")
     s_raw = doc_raw.read()
@@ -440,6 +738,7 @@ def extract_and_translate(
         model=model,
         envs=envs,
         prompt=prompt,
+        page_workers=page_workers,
     )
 
 
@@ -456,6 +755,7 @@ def write_translated_result(
     model: OnnxModel = None,
     envs: Dict = None,
     prompt: List = None,
+    page_workers: int = 1,
     **kwargs: Any,
 ):
     """
@@ -469,6 +769,8 @@ def write_translated_result(
     # 2) 读取原始 PDF
     with open(input_file, "rb") as doc_raw:
         s_raw = doc_raw.read()
+    # Same key as in translate_stream, so the layouts of the extract pass are reused
+    doc_hash = hashlib.sha256(s_raw).hexdigest()
 
     font_list = [("tiro", None)]
 
@@ -0,0 +1,56 @@
+import json
+import os
+
+import numpy as np
+
+from . import shared_constants
+
+# Layout results of every page, so the write pass reuses the inference of the extract pass.
+# One JSONL file per document (keyed by the hash of the PDF bytes) in the job's work dir,
+# one line per page: {"page": pageno, "height": h, "width": w, "boxes": [[class name, x0, y0, x1, y1], ...]}
+LAYOUT_CACHE_DIR = "layout"
+
+
+def get_layout_cache_path(doc_hash):
+    """Return the layout cache file of a document, or None when there is no work dir to keep it in."""
+    if not doc_hash or not shared_constants.PDF_WORK_DIR:
+        return None
+    return os.path.join(shared_constants.PDF_WORK_DIR, LAYOUT_CACHE_DIR, f"{doc_hash}.jsonl")
+
+
+def load_page_layouts(doc_hash):
+    """
+    Load the cached page layouts of a document as {pageno: (height, width, boxes)}, where
+    boxes is a list of (class name, xyxy) in the model's order. A torn last line is ignored.
+    """
+    path = get_layout_cache_path(doc_hash)
+    if not path or not os.path.exists(path):
+        return {}
+
+    page_layouts = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                boxes = [(name, np.array(xyxy, dtype=np.float32)) for name, *xyxy in record["boxes"]]
+                page_layouts[record["page"]] = (record["height"], record["width"], boxes)
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+    return page_layouts
+
+
+def save_page_layout(doc_hash, pageno, height, width, boxes):
+    """Append one page's layout to the document's layout cache."""
+    path = get_layout_cache_path(doc_hash)
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    record = {
+        "page": pageno,
+        "height": height,
+        "width": width,
+        # float32 coordinates survive the trip through JSON floats exactly
+        "boxes": [[name, *(float(v) for v in xyxy)] for name, xyxy in boxes],
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
@@ -0,0 +1,101 @@
+import threading
+
+import numpy as np
+from pymupdf import Document
+
+# Pages sent to the layout model in one inference run
+LAYOUT_BATCH_SIZE = 4
+# How many pages the background thread may render and analyse ahead of the interpreter
+LAYOUT_PREFETCH_PAGES = 8
+
+
+class LayoutPrefetcher:
+    """
+    Render pages and run layout inference ahead of the PDF interpreter in a background thread,
+    so that interpreting page N overlaps with the inference of the next pages.
+    Pages are rendered from their own copy of the document, as the interpreter edits doc_zh meanwhile.
+    """
+
+    def __init__(self, pdf_bytes, pagenos, model, batch_size=LAYOUT_BATCH_SIZE, depth=LAYOUT_PREFETCH_PAGES):
+        self.pdf_bytes = pdf_bytes
+        self.pagenos = list(pagenos)
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.depth = max(self.batch_size, depth)
+        self.condition = threading.Condition()
+        self.results = {}  # pageno -> (height, width, YoloResult)
+        self.taken = 0  # pages handed to the interpreter so far
+        self.waiting = False  # the interpreter is blocked on a page that is not ready
+        self.error = None
+        self.done = False
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="layout-prefetch", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            if not self.pagenos:
+                return
+            doc = Document(stream=self.pdf_bytes)
+            batch = []
+            for index, pageno in enumerate(self.pagenos):
+                with self.condition:
+                    # Run what is rendered so far if the interpreter waits for it or the window is full
+                    flush = batch and (self.waiting or index >= self.taken + self.depth)
+                if flush:
+                    self._predict(batch)
+                    batch = []
+                with self.condition:
+                    while not self.closed and index >= self.taken + self.depth:
+                        self.condition.wait()
+                    if self.closed:
+                        return
+
+                pix = doc[pageno].get_pixmap()
+                # A view on the pixmap's samples; the pixmap stays in the batch until inference is done
+                image = np.frombuffer(pix.samples_mv, np.uint8).reshape(pix.height, pix.width, 3)[:, :, ::-1]
+                batch.append((pageno, pix, image))
+                if len(batch) >= self.batch_size:
+                    self._predict(batch)
+                    batch = []
+            if batch:
+                self._predict(batch)
+        except Exception as e:
+            with self.condition:
+                self.error = e
+        finally:
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+    def _predict(self, batch):
+        page_layouts = self.model.predict_batch(
+            [image for _, _, image in batch],
+            imgsz=[int(pix.height / 32) * 32 for _, pix, _ in batch],
+        )
+        with self.condition:
+            for (pageno, pix, _), page_layout in zip(batch, page_layouts):
+                self.results[pageno] = (pix.height, pix.width, page_layout)
+            self.condition.notify_all()
+
+    def get(self, pageno):
+        """Wait for the layout of a page and return (height, width, YoloResult)."""
+        with self.condition:
+            while pageno not in self.results:
+                if self.error:
+                    raise self.error
+                if self.done:
+                    raise KeyError(f"Page {pageno} was not scheduled for layout inference")
+                self.waiting = True
+                self.condition.wait()
+            self.waiting = False
+            self.taken += 1
+            self.condition.notify_all()
+            return self.results.pop(pageno)
+
+    def close(self):
+        """Stop the background thread, e.g. when the job is cancelled."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
@@ -1 +1 @@
-PDF_FILE_NAME = None
\ No newline at end of file
+PDF_WORK_DIR = None
\ No newline at end of file
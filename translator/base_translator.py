@@ -1,53 +1,194 @@
 import os
 import shutil
 import json
+import hashlib
+import sqlite3
+import threading
+import uuid
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from config.log_config import app_logger
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-from llmWrapper.llm_wrapper import translate_text
-from textProcessing.text_separator import stream_segment_json, split_text_by_token_limit, recombine_split_jsons
-from config.load_prompt import load_prompt
-from .translation_checker import process_translation_results, clean_json, check_and_sort_translations
+
+from llmWrapper.llm_wrapper import translate_text, get_max_concurrency, get_wire_format, prepare_model
+from textProcessing.text_separator import stream_segment_json, split_text_by_token_limit, recombine_split_jsons, deduplicate_entries, normalize_text, load_json_records, create_segment_output
+from textProcessing.tokenizer import get_model_encoding, count_tokens
+from config.load_prompt import load_prompt, load_source_context_prompt
+from .translation_checker import process_translation_results, clean_json, check_and_sort_translations, save_json
+from .translation_checker import WIRE_FORMATS, WIRE_FORMAT_INSTRUCTIONS, encode_segment_for_wire, encode_context_for_wire, decode_wire_response
+from .translation_memory import TranslationMemory, hash_prompts
 
 SRC_JSON_PATH = "src.json"
 SRC_SPLIT_JSON_PATH = "src_split.json"
-RESULT_SPLIT_JSON_PATH = "dst_translated_split.json"
-FAILED_JSON_PATH = "dst_translated_failed.json"
+SRC_PENDING_JSON_PATH = "src_pending.json"
+RESULT_SPLIT_JSON_PATH = "dst_translated_split.jsonl"
+FAILED_JSON_PATH = "dst_translated_failed.jsonl"
 RESULT_JSON_PATH = "dst_translated.json"
+JOB_MANIFEST_PATH = "job.json"
+
+# Every run works in <workspace_root>/<job id>, with a random suffix unless it resumes, and
+# writes its output to <result_root>/<job id>, one folder per input and settings that each
+# run of the job overwrites
+WORKSPACE_ROOT = "temp"
+RESULT_ROOT = "result"
+# A resumable workspace is locked through <workspace>.lock while a run uses it
+WORKSPACE_LOCK_SUFFIX = ".lock"
+
+
+def _lock_workspace(lock_path):
+    """
+    Take an exclusive lock on lock_path that holds across processes (the app and cli.py alike).
+    Returns the open lock file, or None when another run holds the lock. The OS drops the lock
+    when its holder exits, so a crashed run never leaves a stale one.
+    """
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    while True:
+        lock_file = open(lock_path, "a+")
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return None
+        # The previous holder removes the file on release; a lock on a removed file
+        # guards nothing, so lock the file now at lock_path instead
+        try:
+            if os.path.samestat(os.fstat(lock_file.fileno()), os.stat(lock_path)):
+                return lock_file
+        except OSError:
+            pass
+        _unlock_workspace(lock_file, remove=False)
+
+
+def _unlock_workspace(lock_file, remove=True):
+    """Release the lock and remove the lock file, unless another run has locked it meanwhile."""
+    # Removed while still locked, so no other run can lock the file that is about to go away
+    if remove and fcntl:
+        _remove_lock_file(lock_file.name)
+    try:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+    finally:
+        lock_file.close()
+    # Windows cannot remove an open file, which also keeps it from removing one another run holds
+    if remove and not fcntl:
+        _remove_lock_file(lock_file.name)
+
+
+def _remove_lock_file(lock_path):
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+
+# Context modes: "translated" feeds the tail of the previous translation back in,
+# "source" also sends the preceding source entries, under their own prompt, so every
+# segment is independent. Source context is opt-in, whatever the concurrency.
+CONTEXT_MODES = ("translated", "source")
+SOURCE_CONTEXT_ENTRIES = 3
 
 class DocumentTranslator:
-    def __init__(self, input_file_path, model, use_online, api_key, src_lang, dst_lang, max_token, max_retries, previous_text=None):
+    def __init__(self, input_file_path, model, use_online, api_key, src_lang, dst_lang, max_token, max_retries, previous_text=None, max_concurrency=None, context_mode="translated", use_translation_memory=False, resume=False, workspace_root=WORKSPACE_ROOT, result_root=RESULT_ROOT, wire_format="json"):
         self.input_file_path = input_file_path
         self.model = model
         self.src_lang = src_lang
         self.dst_lang = dst_lang
         self.max_token = max_token
+        self.tokenizer = get_model_encoding(model)
         self.previous_text = previous_text
         self.use_online = use_online
         self.api_key = api_key
         self.max_retries = max_retries
+        self.max_concurrency = max_concurrency or get_max_concurrency(model, use_online)
         self.translated_failed = True
 
-        # Extract just the filename without the directory path
+        if context_mode not in CONTEXT_MODES:
+            app_logger.warning(f"Unknown context mode '{context_mode}', using translated.")
+            context_mode = "translated"
+        self.context_mode = context_mode
+        self.source_context = None
+        self.use_translation_memory = use_translation_memory
+        self.duplicate_counts = {}
+        self.resume = resume
+
+        wire_format = get_wire_format(model, use_online, wire_format)
+        if wire_format not in WIRE_FORMATS:
+            app_logger.warning(f"Unknown wire format '{wire_format}', using json.")
+            wire_format = "json"
+        self.wire_format = wire_format
+        self.committed_counts = set()
+
+        # Requests sent and source tokens in them, for throughput reporting
+        self.segments_sent = 0
+        self.tokens_sent = 0
+        self._stats_lock = threading.Lock()
+
+        # Name the job after the file and what it is translated with, so a resumed
+        # run finds its workspace again
         filename = os.path.splitext(os.path.basename(input_file_path))[0]
-        
-        # Create a directory path using the filename
-        self.file_dir = os.path.join("temp", filename)
+        self.workspace_root = workspace_root
+        self.result_root = result_root
+        self.job_key = self._get_job_key()
+        self._set_workspace(f"{filename}-{self.job_key[:12]}")
+        self.result_dir = os.path.join(self.result_root, self.job_id)
+
+        # Load translation prompts
+        self.system_prompt, self.user_prompt, self.previous_prompt, self.previous_text_default = load_prompt(src_lang, dst_lang)
+        self.source_context_prompt = load_source_context_prompt(dst_lang)
+        if self.previous_text is None:
+            self.previous_text = self.previous_text_default
+        if self.wire_format in WIRE_FORMAT_INSTRUCTIONS:
+            self.system_prompt = f"{self.system_prompt}\n{WIRE_FORMAT_INSTRUCTIONS[self.wire_format]}"
+
+    def _set_workspace(self, job_id):
+        """Point every job file at the workspace of job_id."""
+        self.job_id = job_id
+        self.file_dir = os.path.join(self.workspace_root, job_id)
         
         # Update all the JSON paths
         self.src_json_path = os.path.join(self.file_dir, SRC_JSON_PATH)
         self.src_split_json_path = os.path.join(self.file_dir, SRC_SPLIT_JSON_PATH)
+        self.pending_json_path = os.path.join(self.file_dir, SRC_PENDING_JSON_PATH)
         self.result_split_json_path = os.path.join(self.file_dir, RESULT_SPLIT_JSON_PATH)
         self.failed_json_path = os.path.join(self.file_dir, FAILED_JSON_PATH)
         self.result_json_path = os.path.join(self.file_dir, RESULT_JSON_PATH)
-        
-        # Ensure the directory exists
-        os.makedirs(self.file_dir, exist_ok=True)
+        self.job_manifest_path = os.path.join(self.file_dir, JOB_MANIFEST_PATH)
+
+    def _claim_workspace(self):
+        """
+        Reserve a workspace no other run uses.
+        A fresh run works in a workspace of its own (the job name plus a random suffix).
+        A resumed run locks the job's stable workspace; if another run, in this process or
+        another one, holds it, this run starts fresh in a workspace of its own instead.
+        """
+        self._workspace_lock_file = None
+        if self.resume:
+            self._workspace_lock_file = _lock_workspace(self.file_dir + WORKSPACE_LOCK_SUFFIX)
+            if self._workspace_lock_file:
+                return
+            app_logger.info("The same job is already running, starting fresh instead of resuming.")
+            self.resume = False
+        self._set_workspace(f"{self.job_id}-{uuid.uuid4().hex[:8]}")
 
-        # Load translation prompts
-        self.system_prompt, self.user_prompt, self.previous_prompt, self.previous_text_default = load_prompt(src_lang, dst_lang)
-        if self.previous_text is None:
-            self.previous_text = self.previous_text_default
+    def _release_workspace(self):
+        if self._workspace_lock_file:
+            _unlock_workspace(self._workspace_lock_file)
+            self._workspace_lock_file = None
 
     def extract_content_to_json(self):
         """Abstract method: Extract document content to JSON."""
@@ -60,31 +201,30 @@ class DocumentTranslator:
     def translate_content(self, progress_callback):
         app_logger.info("Segmenting JSON content...")
         stream_generator = stream_segment_json(
-            self.src_split_json_path,
+            self.pending_json_path,
             self.max_token,
             self.system_prompt,
             self.user_prompt,
             self.previous_prompt,
             self.previous_text,
+            self.tokenizer,
         )
         
         if stream_generator is None:
             app_logger.warning("Failed to generate segments.")
             return
 
-        app_logger.info("Translating segments...")
+        app_logger.info(f"Translating segments (up to {self.max_concurrency} in flight)...")
         combined_previous_texts = []
-        for segment, segment_progress in stream_generator():
+
+        def commit_segment(segment, segment_progress, future):
             try:
-                translated_text = translate_text(
-                    segment, self.previous_text, self.model, self.use_online, self.api_key,
-                    self.system_prompt, self.user_prompt, self.previous_prompt
-                )
+                translated_text = future.result()
 
                 if not translated_text:
                     app_logger.warning("translate_text returned empty or None.")
                     self._mark_segment_as_failed(segment)
-                    continue
+                    return
                 
                 process_translation_results(segment, translated_text, self.result_split_json_path, self.failed_json_path, self.src_lang, self.dst_lang)
                 
@@ -104,26 +244,32 @@ class DocumentTranslator:
                 app_logger.warning(f"Error encountered: {e}. Marking segment as failed.")
                 self._mark_segment_as_failed(segment)
 
-            if progress_callback:
-                progress_callback(segment_progress, desc="Translating...Please wait.")
-                app_logger.info(f"Progress: {segment_progress * 100:.2f}%")
+            finally:
+                if progress_callback:
+                    progress_callback(segment_progress, desc="Translating...Please wait.")
+                    app_logger.info(f"Progress: {segment_progress * 100:.2f}%")
+
+        self._dispatch_segments(stream_generator, commit_segment)
 
     def retranslate_failed_content(self, progress_callback):
-        app_logger.info("Retrying translation for failed segments (single attempt only)...")
+        """
+        Retry the failed entries with a bisecting schedule.
+        The failed entries are first packed with the full token budget. Whenever a batch
+        fails again, only its failed entries are retried, in batches of half its size and
+        down to single entries, until every entry has used up max_retries attempts.
+        Each batch is scheduled as soon as the batch it came from is committed.
+        Returns True if entries are still failed afterwards.
+        """
+        app_logger.info("Retrying translation for failed segments...")
         if not os.path.exists(self.failed_json_path):
             app_logger.info("No failed segments to retranslate. Skipping this step.")
             return False
 
-        # Check if file is empty or contains an empty JSON array
-        with open(self.failed_json_path, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                if not data:  # If the JSON is an empty list or dict
-                    app_logger.info("No failed segments to retranslate. Skipping this step.")
-                    return False
-            except json.JSONDecodeError:
-                app_logger.error("Failed to decode JSON. Skipping this step.")
-                return False
+        # Check if the failed store is empty
+        original_segments = load_json_records(self.failed_json_path)
+        if not original_segments:
+            app_logger.info("No failed segments to retranslate. Skipping this step.")
+            return False
 
         stream_generator_failed = stream_segment_json(
             self.failed_json_path,
@@ -131,41 +277,34 @@ class DocumentTranslator:
             self.system_prompt,
             self.user_prompt,
             self.previous_prompt,
-            self.previous_text
+            self.previous_text,
+            self.tokenizer
         )
         if stream_generator_failed is None:
             app_logger.info("All text has been translated.")
             return False
 
-        # Read the original failed segments
-        with open(self.failed_json_path, 'r', encoding='utf-8') as f:
-            original_segments = json.load(f)
-        with open(self.failed_json_path, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=4)
-        
-        # Keep track of which segments we're going to process in this run
-        segments_to_process = original_segments.copy()
-        combined_previous_texts = []
- 
-        for segment, segment_progress in stream_generator_failed():
+        # (segment, attempt) pairs waiting to be sent
+        pending = deque((segment, 1) for segment, _ in stream_generator_failed())
+
+        # The failed store now only collects entries that ran out of attempts
+        open(self.failed_json_path, "w", encoding="utf-8").close()
+
+        total_entries = len(original_segments)
+        settled_entries = 0
+        still_failed = False
+
+        def commit_retry(segment, attempt, future):
+            nonlocal settled_entries, still_failed
+            segment_dict = json.loads(clean_json(segment))
             try:
-                translated_text = translate_text(
-                    segment,
-                    self.previous_text,
-                    self.model,
-                    self.use_online,
-                    self.api_key,
-                    self.system_prompt,
-                    self.user_prompt,
-                    self.previous_prompt
-                )
+                translated_text = future.result()
+            except (json.JSONDecodeError, ValueError, RuntimeError) as e:
+                app_logger.warning(f"Error encountered: {e}. Marking segment as failed.")
+                translated_text = None
 
-                if not translated_text:
-                    app_logger.warning("translate_text returned empty or None.")
-                    self._mark_segment_as_failed(segment)
-                    continue
-                
-                process_translation_results(segment, translated_text, self.result_split_json_path, self.failed_json_path, self.src_lang, self.dst_lang)
+            if translated_text:
+                failed_entries = process_translation_results(segment, translated_text, self.result_split_json_path, None, self.src_lang, self.dst_lang)
 
                 # Update previous text context with last 3 lines if possible
                 try:
@@ -173,63 +312,378 @@ class DocumentTranslator:
                     self.previous_text = "\n".join(last_3_entries)
                 except (IndexError, AttributeError):
                     app_logger.warning("Couldn't extract context from translation. Using default.")
-                    
-                combined_previous_texts.append(translated_text)
-                
-                # Remove this segment from segments we've processed
-                if segment in segments_to_process:
-                    segments_to_process.remove(segment)
-
-            except (json.JSONDecodeError, ValueError, RuntimeError) as e:
-                app_logger.warning(f"Error encountered: {e}. Segment will remain in failed list.")
+            else:
+                app_logger.warning("translate_text returned empty or None.")
+                failed_entries = [{"count": int(count), "value": value.strip()} for count, value in segment_dict.items()]
+
+            settled_entries += len(segment_dict) - len(failed_entries)
+            if failed_entries and attempt < self.max_retries:
+                # Retry the failed entries at half the batch size, ahead of the rest
+                batch_size = max(1, len(segment_dict) // 2)
+                batches = [failed_entries[i:i + batch_size] for i in range(0, len(failed_entries), batch_size)]
+                app_logger.info(f"Retrying {len(failed_entries)} failed entries in {len(batches)} batches of up to {batch_size}.")
+                for batch in reversed(batches):
+                    retry_dict = {str(item["count"]): item["value"] for item in batch}
+                    pending.appendleft((create_segment_output(retry_dict), attempt + 1))
+            elif failed_entries:
+                save_json(self.failed_json_path, failed_entries)
+                settled_entries += len(failed_entries)
+                still_failed = True
 
             if progress_callback:
-                progress_callback(segment_progress, desc="Missing detected! Translating once...")
+                segment_progress = min(settled_entries / total_entries, 1.0)
+                progress_callback(segment_progress, desc="Missing detected! Translating again...")
                 app_logger.info(f"Progress: {segment_progress * 100:.2f}%")
-        return True
+
+        # Unlike _dispatch_segments, committing a batch can schedule new ones
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_concurrency:
+                    segment, attempt = pending.popleft()
+                    future = executor.submit(self._translate_segment, segment, *self._get_segment_context(segment))
+                    in_flight.append((segment, attempt, future))
+                commit_retry(*in_flight.popleft())
+
+        return still_failed
+
+    def _dispatch_segments(self, stream_generator, commit_segment):
+        """
+        Send segments to the model with at most max_concurrency requests in flight.
+        Finished requests are committed strictly in segment order, so the result and
+        failed stores and progress reporting see the same sequence as a serial run.
+        In "translated" context mode each request uses the previous_text of the latest
+        committed segment; in "source" mode it gets the preceding entries of src_split.json.
+        """
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for segment, segment_progress in stream_generator():
+                future = executor.submit(self._translate_segment, segment, *self._get_segment_context(segment))
+                in_flight.append((segment, segment_progress, future))
+
+                # Wait for the oldest request once the window is full
+                if len(in_flight) >= self.max_concurrency:
+                    commit_segment(*in_flight.popleft())
+
+            while in_flight:
+                commit_segment(*in_flight.popleft())
+
+    def _translate_segment(self, segment, previous_text, source_context=None):
+        """Send one segment in the model's wire format and return the response as a ```json segment."""
+        segment_tokens = count_tokens(segment, self.tokenizer)
+        with self._stats_lock:
+            self.segments_sent += 1
+            self.tokens_sent += segment_tokens
+        expected_keys = list(json.loads(clean_json(segment)))
+        translated_text = translate_text(
+            encode_segment_for_wire(segment, self.wire_format),
+            encode_context_for_wire(previous_text, self.wire_format),
+            self.model,
+            self.use_online,
+            self.api_key,
+            self.system_prompt,
+            self.user_prompt,
+            self.previous_prompt,
+            expected_keys=expected_keys,
+            source_context=encode_context_for_wire(source_context, self.wire_format) if source_context else None,
+            source_context_prompt=self.source_context_prompt
+        )
+        return decode_wire_response(translated_text, self.wire_format, expected_keys)
+
+    def _get_segment_context(self, segment):
+        """
+        Return (previous_text, source_context) to send along with this segment.
+        previous_text is the output format example: the tail of the latest translation, or
+        the default example in "source" mode, where source_context holds the preceding
+        source entries (None when there are none).
+        """
+        if self.context_mode != "source":
+            return self.previous_text, None
+
+        if self.source_context is None:
+            self._load_source_context()
+
+        try:
+            segment_dict = json.loads(clean_json(segment))
+            first_count = min(int(count) for count in segment_dict)
+        except (json.JSONDecodeError, ValueError, AttributeError):
+            return self.previous_text_default, None
+
+        counts, values = self.source_context
+        position = bisect_left(counts, first_count)
+        start = max(0, position - SOURCE_CONTEXT_ENTRIES)
+        if start == position:
+            return self.previous_text_default, None
+
+        # Same shape as the lines taken from a translated segment
+        preceding = {str(counts[i]): values[i] for i in range(start, position)}
+        return self.previous_text_default, "\n".join(json.dumps(preceding, ensure_ascii=False, indent=4).splitlines()[1:-1])
+
+    def _load_source_context(self):
+        """Index the source entries by count so context lookups don't touch the disk."""
+        try:
+            with open(self.src_split_json_path, "r", encoding="utf-8") as f:
+                src_data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            app_logger.warning(f"Could not load source context: {e}. Using default context.")
+            src_data = []
+
+        entries = sorted(
+            (int(item["count"]), item.get("value", "").strip())
+            for item in src_data
+            if "count" in item and item.get("value", "").strip()
+        )
+        counts = [count for count, _ in entries]
+        values = [value for _, value in entries]
+        self.source_context = (counts, values)
+
+    def _prepare_pending_entries(self):
+        """
+        Write the entries that still need the model to the pending file.
+        Repeated values are collapsed to one representative, and entries already in
+        the translation memory go straight to the result store.
+        Returns the number of pending entries.
+        """
+        with open(self.src_split_json_path, "r", encoding="utf-8") as f:
+            pending = json.load(f)
+
+        if self.committed_counts:
+            pending = [item for item in pending if str(item.get("count")) not in self.committed_counts]
+            app_logger.info(f"Resuming job: {len(self.committed_counts)} entries already translated, {len(pending)} left.")
+
+        pending, self.duplicate_counts = deduplicate_entries(pending)
+        if self.duplicate_counts:
+            duplicate_total = sum(len(counts) for counts in self.duplicate_counts.values())
+            app_logger.info(f"Skipping {duplicate_total} duplicate entries, they will reuse the translation of their first occurrence.")
+
+        if self.use_translation_memory:
+            pending = self._apply_translation_memory(pending)
+
+        with open(self.pending_json_path, "w", encoding="utf-8") as f:
+            json.dump(pending, f, ensure_ascii=False, indent=4)
+        return len(pending)
+
+    def _expand_duplicate_translations(self):
+        """Copy each representative's translation to every entry that shares its value."""
+        if not self.duplicate_counts or not self._has_results():
+            return
+
+        results = load_json_records(self.result_split_json_path)
+        translated_by_count = {str(item["count"]): item["translated"] for item in results}
+
+        with open(self.src_split_json_path, "r", encoding="utf-8") as f:
+            src_values = {str(item["count"]): item.get("value", "").strip() for item in json.load(f)}
+
+        copies = []
+        for representative, counts in self.duplicate_counts.items():
+            translated = translated_by_count.get(str(representative))
+            if translated is None:
+                continue  # The representative failed, its duplicates are reported missing with it
+            for count in counts:
+                copies.append({
+                    "count": str(count),
+                    "original": src_values.get(str(count), ""),
+                    "translated": translated
+                })
+
+        if copies:
+            save_json(self.result_split_json_path, copies)
+            app_logger.info(f"Filled in {len(copies)} duplicate entries from their representatives.")
+
+    def _open_translation_memory(self):
+        return TranslationMemory(
+            self.src_lang,
+            self.dst_lang,
+            self.model,
+            hash_prompts(self.system_prompt, self.user_prompt, self.previous_prompt),
+        )
+
+    def _apply_translation_memory(self, entries):
+        """Commit translation memory hits to the result store and return the misses."""
+        try:
+            memory = self._open_translation_memory()
+        except sqlite3.Error as e:
+            app_logger.warning(f"Translation memory unavailable: {e}. Translating everything.")
+            return entries
+
+        try:
+            found = memory.lookup(entry.get("value", "") for entry in entries)
+            hits = []
+            misses = []
+            for entry in entries:
+                translation = found.get(normalize_text(entry.get("value", "")))
+                if translation is None:
+                    misses.append(entry)
+                else:
+                    hits.append({
+                        "count": str(entry["count"]),
+                        "original": entry["value"].strip(),
+                        "translated": translation
+                    })
+            stats = memory.stats()
+        finally:
+            memory.close()
+
+        if hits:
+            save_json(self.result_split_json_path, hits)
+        app_logger.info(
+            f"Translation memory: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate'] * 100:.1f}% hit rate), {len(misses)} entries left to translate."
+        )
+        return misses
+
+    def _update_translation_memory(self):
+        """Write the validated translations of this job back to the translation memory."""
+        if not self.use_translation_memory or not self._has_results():
+            return
+
+        results = load_json_records(self.result_split_json_path)
+
+        try:
+            memory = self._open_translation_memory()
+            try:
+                stored = memory.store(
+                    (item.get("original", ""), item.get("translated", "")) for item in results
+                )
+            finally:
+                memory.close()
+        except sqlite3.Error as e:
+            app_logger.warning(f"Could not update translation memory: {e}")
+            return
+        app_logger.info(f"Translation memory updated with {stored} entries.")
+
+    def _has_results(self):
+        return os.path.exists(self.result_split_json_path)
 
     def _convert_failed_segments_to_json(self, failed_segments):
         converted_json = {failed_segments["count"]: failed_segments["value"]}
         return json.dumps(converted_json, indent=4, ensure_ascii=False)
 
-    def _clear_temp_folder(self):
-        temp_folder = "temp"
+    def _get_job_key(self):
+        """Identify a job by the input file content, the language pair and the model."""
+        digest = hashlib.sha256()
+        with open(self.input_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(json.dumps([self.src_lang, self.dst_lang, self.model]).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _read_job_manifest(self):
+        try:
+            with open(self.job_manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write_job_manifest(self, split_hash=None):
+        manifest = {
+            "job_key": self.job_key,
+            "input_file": os.path.basename(self.input_file_path),
+            "src_lang": self.src_lang,
+            "dst_lang": self.dst_lang,
+            "model": self.model,
+            "split_hash": split_hash,
+        }
+        with open(self.job_manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+    def _hash_split_file(self):
+        with open(self.src_split_json_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _prepare_job(self):
+        """
+        Set up the workspace for this job.
+        In resume mode a previous run of the same job keeps its committed results and
+        everything else in its workspace is rebuilt; otherwise the workspace starts empty.
+        Returns True when committed results are being reused.
+        """
+        self.committed_counts = set()
+        os.makedirs(self.result_dir, exist_ok=True)
+
+        if not self.resume:
+            self._clear_job_folder()
+            self._write_job_manifest()
+            return False
+
+        manifest = self._read_job_manifest()
+        if manifest.get("job_key") != self.job_key or not self._has_results():
+            if manifest:
+                app_logger.info("No resumable results for this file, language pair and model. Starting fresh.")
+            self._clear_job_folder()
+            self._write_job_manifest()
+            return False
+
+        # Rewrite the result store once, dropping a line torn by the interruption
+        committed = [
+            item for item in load_json_records(self.result_split_json_path)
+            if isinstance(item, dict) and "count" in item
+        ]
+        keep = {JOB_MANIFEST_PATH, RESULT_SPLIT_JSON_PATH}
+        for name in os.listdir(self.file_dir):
+            if name not in keep:
+                path = os.path.join(self.file_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+        open(self.result_split_json_path, "w", encoding="utf-8").close()
+        save_json(self.result_split_json_path, committed)
+
+        self.committed_counts = {str(item["count"]) for item in committed}
+        app_logger.info(f"Resuming job with {len(self.committed_counts)} committed entries.")
+        return True
+
+    def _check_resumed_split(self, resumed):
+        """Drop the committed results if the document no longer splits the same way."""
+        split_hash = self._hash_split_file()
+        if resumed and self._read_job_manifest().get("split_hash") not in (None, split_hash):
+            app_logger.warning("The split source changed since the last run, discarding committed results.")
+            open(self.result_split_json_path, "w", encoding="utf-8").close()
+            self.committed_counts = set()
+        self._write_job_manifest(split_hash)
+
+    def _clear_job_folder(self):
+        """Empty this job's workspace without touching other jobs."""
         try:
-            if os.path.exists(temp_folder):
-                app_logger.info("Clearing temp folder...")
-                shutil.rmtree(temp_folder)
+            if os.path.exists(self.file_dir):
+                app_logger.info("Clearing job folder...")
+                shutil.rmtree(self.file_dir)
         except Exception as e:
-            app_logger.warning(f"Could not delete temp folder: {str(e)}. Continuing with existing folder.")
+            app_logger.warning(f"Could not delete job folder: {str(e)}. Continuing with existing folder.")
         finally:
-            os.makedirs(temp_folder,exist_ok=True)
-    
-    def _mark_segment_as_failed(self, segment):        
-        if not os.path.exists(self.failed_json_path):
-            with open(self.failed_json_path, "w", encoding="utf-8") as f:
-                json.dump([], f)
-
-        with open(self.failed_json_path, "r+", encoding="utf-8") as f:
-            try:
-                failed_segments = json.load(f)
-            except json.JSONDecodeError:
-                failed_segments = []
+            os.makedirs(self.file_dir, exist_ok=True)
 
-            try:
-                clean_segment = clean_json(segment)
-                segment_dict = json.loads(clean_segment)
-            except json.JSONDecodeError as e:
-                app_logger.error(f"Failed to decode JSON segment: {segment}. Error: {e}")
-                return
-            for count, value in segment_dict.items():
-                failed_segments.append({
-                    "count": int(count),
-                    "value": value.strip()
-                })
-            f.seek(0)
-            json.dump(failed_segments, f, ensure_ascii=False, indent=4)
+    def _mark_segment_as_failed(self, segment):
+        try:
+            clean_segment = clean_json(segment)
+            segment_dict = json.loads(clean_segment)
+        except json.JSONDecodeError as e:
+            app_logger.error(f"Failed to decode JSON segment: {segment}. Error: {e}")
+            return
+        save_json(self.failed_json_path, [
+            {"count": int(count), "value": value.strip()}
+            for count, value in segment_dict.items()
+        ])
 
     def process(self, file_name, file_extension, progress_callback=None):
-        self._clear_temp_folder()
+        self._claim_workspace()
+        finished = False
+        try:
+            result = self._run_job(file_name, file_extension, progress_callback)
+            finished = True
+        finally:
+            # A finished job leaves only its output behind; an interrupted one keeps its
+            # workspace only if a later run can resume it
+            if finished or not self.resume:
+                shutil.rmtree(self.file_dir, ignore_errors=True)
+            self._release_workspace()
+        return result
+
+    def _run_job(self, file_name, file_extension, progress_callback=None):
+        # Load the model while the document is being extracted
+        prepare_model(self.model, self.use_online, self.max_token)
+        resumed = self._prepare_job()
 
         app_logger.info("Extracting content to JSON...")
         if progress_callback:
@@ -239,20 +693,26 @@ class DocumentTranslator:
         app_logger.info("Split JSON...")
         if progress_callback:
             progress_callback(0, desc="Extracting text, please wait...")
-        split_text_by_token_limit(self.src_json_path)
+        split_text_by_token_limit(self.src_json_path, encoding_name=self.tokenizer)
+        self._check_resumed_split(resumed)
+
+        pending_count = self._prepare_pending_entries()
         
         app_logger.info("Translating content...")
         if progress_callback:
             progress_callback(0, desc="Translating, please wait...")
-        self.translate_content(progress_callback)
+        if pending_count or not self._has_results():
+            self.translate_content(progress_callback)
+        else:
+            app_logger.info("Every entry was found in the translation memory, nothing to send.")
 
-        retry_count = 0
-        while retry_count < self.max_retries and self.translated_failed:
+        if self.max_retries > 0:
             if progress_callback:
-                progress_callback(0, 
-                                desc=f"Translating, attempt {retry_count+1}/{self.max_retries}...")            
-            self.translated_failed = self.retranslate_failed_content(progress_callback)    
-            retry_count += 1
+                progress_callback(0, desc=f"Retrying failed entries, up to {self.max_retries} attempts each...")
+            self.translated_failed = self.retranslate_failed_content(progress_callback)
+
+        self._expand_duplicate_translations()
+        self._update_translation_memory()
 
         if progress_callback:
             progress_callback(0, desc="Checking for errors...")
@@ -267,7 +727,6 @@ class DocumentTranslator:
             progress_callback(0, desc="Translation completed, new file being generated...")
         self.write_translated_json_to_file(self.src_json_path, self.result_json_path, progress_callback)
 
-        result_folder = "result" 
         base_name = os.path.basename(file_name)
-        final_output_path = os.path.join(result_folder, f"{base_name}_translated{file_extension}")
+        final_output_path = os.path.join(self.result_dir, f"{base_name}_translated{file_extension}")
         return final_output_path,missing_counts
\ No newline at end of file
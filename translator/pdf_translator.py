@@ -4,30 +4,50 @@ from .PDFMathTranslate.cache import init_db,clean_all_dbs
 from .base_translator import DocumentTranslator
 from contextlib import contextmanager
 from .PDFMathTranslate import shared_constants
+from config.load_config import load_json_config
 import os
+import threading
 
-model = OnnxModel.load_available()
+# Thread counts of the layout model's inference session, 0 leaves them to onnxruntime
+_system_config = load_json_config(os.path.join("config", "system_config.json")) or {}
+_model = None
+
+# The PDF cache database and work dir are module globals, so PDF jobs in one process run one at a time
+_pdf_job_lock = threading.Lock()
+
+def get_layout_model():
+    """Load the layout model on the first PDF job (which holds _pdf_job_lock), not on import."""
+    global _model
+    if _model is None:
+        _model = OnnxModel.load_available(
+            intra_op_num_threads=_system_config.get("layout_intra_op_threads", 0),
+            inter_op_num_threads=_system_config.get("layout_inter_op_threads", 0),
+        )
+    return _model
 
 class PdfTranslator(DocumentTranslator):
+    def process(self, file_name, file_extension, progress_callback=None):
+        with _pdf_job_lock:
+            return super().process(file_name, file_extension, progress_callback)
+
     def extract_content_to_json(self,progress_callback=None):
         if progress_callback:
             progress_callback(0, desc="Initializing and extracting PDF content...")
-        _,self.cache_folder= init_db(remove_exists=True)
-
-        shared_constants.PDF_FILE_NAME = os.path.splitext(os.path.basename(self.input_file_path))[0]
-        temp_folder = os.path.join("temp", shared_constants.PDF_FILE_NAME)
         os.makedirs(self.file_dir, exist_ok=True)
+        _,self.cache_folder= init_db(remove_exists=True, cache_folder=self.file_dir)
+
+        shared_constants.PDF_WORK_DIR = self.file_dir
 
         # translate(files=input_file,model=model,thread=1,lang_in=self.src_lang,lang_out=self.dst_lang,service="google")
-        extract_and_translate(input_file=self.input_file_path,model=model,thread=1,lang_in=self.src_lang,lang_out=self.dst_lang,service="google")
+        extract_and_translate(input_file=self.input_file_path,model=get_layout_model(),thread=1,lang_in=self.src_lang,lang_out=self.dst_lang,service="google",page_workers=_system_config.get("pdf_page_workers", 1))
         
-        return os.path.join(temp_folder,"src.json")
+        return os.path.join(self.file_dir,"src.json")
     
     def write_translated_json_to_file(self, json_path, translated_json_path,progress_callback=None):
         if progress_callback:
             progress_callback(0, desc="Preparing to write translated content...")
 
-        write_translated_result(input_file=self.input_file_path,model=model,thread=1,lang_in=self.src_lang,lang_out=self.dst_lang,service="google")
+        write_translated_result(input_file=self.input_file_path,output_dir=self.result_dir,model=get_layout_model(),thread=1,lang_in=self.src_lang,lang_out=self.dst_lang,service="google",page_workers=_system_config.get("pdf_page_workers", 1))
         if progress_callback:
             progress_callback(80, desc="File writing complete, cleaning db...")
         clean_all_dbs(self.cache_folder)
@@ -0,0 +1,33 @@
+from importlib import import_module
+from config.log_config import app_logger
+
+# Dictionary mapping file extensions to their corresponding translator module paths
+TRANSLATOR_MODULES = {
+    ".docx": "translator.word_translator.WordTranslator",
+    ".pptx": "translator.ppt_translator.PptTranslator",
+    ".xlsx": "translator.excel_translator.ExcelTranslator",
+    ".pdf": "translator.pdf_translator.PdfTranslator",
+    ".srt": "translator.subtile_translator.SubtitlesTranslator",
+    ".txt": "translator.txt_translator.TxtTranslator",
+    # ".epub": "translator.epub_translator.EpubTranslator"
+}
+
+def get_translator_class(file_extension):
+    """Dynamically import and return the appropriate translator class for the file extension."""
+    module_path = TRANSLATOR_MODULES.get(file_extension.lower())
+    if not module_path:
+        return None
+    
+    try:
+        # Split into module path and class name
+        module_name, class_name = module_path.rsplit('.', 1)
+        
+        # Import the module
+        module = import_module(module_name)
+        
+        # Get the class
+        translator_class = getattr(module, class_name)
+        return translator_class
+    except (ImportError, AttributeError) as e:
+        app_logger.exception(f"Error importing translator for {file_extension}: {e}")
+        return None
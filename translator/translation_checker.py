@@ -2,6 +2,7 @@ import json
 import os
 import re
 from config.log_config import app_logger
+from textProcessing.text_separator import iter_jsonl, load_json_records
 
 def detect_language_characters(text, lang_code):
     """
@@ -54,6 +55,115 @@ def clean_json(text):
     text = re.sub(r',\s*\]', ']', text)  # Fix ", ]" issue
     return text
 
+# Wire formats for segments sent to the model. "json" is the fenced, indented block the
+# pipeline works with; the others are encoded just before the request and turned back
+# into that block as soon as the response arrives.
+WIRE_FORMATS = ("json", "minified", "lines")
+
+WIRE_FORMAT_INSTRUCTIONS = {
+    "minified": (
+        "The text is sent as a single-line JSON object {\"<Text ID>\":\"<Original Text>\"}. "
+        "Answer with a single-line JSON object {\"<Text ID>\":\"<Translated Text>\"} using the same IDs."
+    ),
+    "lines": (
+        "The text is sent one entry per line as <Text ID>: <Original Text>, with line breaks written as \\n. "
+        "This replaces the JSON format described above: answer with one line per entry as "
+        "<Text ID>: <Translated Text>, using the same IDs and keeping \\n escapes, and nothing else."
+    ),
+}
+
+_WIRE_LINE_PATTERN = re.compile(r"^\s*(\d+)\s*[:：]\s?(.*)$")
+
+def _escape_wire_line(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+
+def _unescape_wire_line(text):
+    return re.sub(r"\\([\\nr])", lambda m: {"n": "\n", "r": "\r", "\\": "\\"}[m.group(1)], text)
+
+def _encode_entries(entries, wire_format):
+    if wire_format == "minified":
+        return json.dumps(entries, ensure_ascii=False, separators=(",", ":"))
+    return "\n".join(f"{key}: {_escape_wire_line(str(value))}" for key, value in entries.items())
+
+def encode_segment_for_wire(segment, wire_format):
+    """Re-encode a ```json segment in the model's wire format."""
+    if wire_format not in ("minified", "lines"):
+        return segment
+    try:
+        entries = json.loads(clean_json(segment))
+    except json.JSONDecodeError:
+        return segment
+    return _encode_entries(entries, wire_format)
+
+def encode_context_for_wire(previous_text, wire_format):
+    """
+    Re-encode the context block in the wire format. The context is either a dict
+    (the default context) or lines cut from a ```json segment; anything else is left as is.
+    """
+    if wire_format not in ("minified", "lines"):
+        return previous_text
+    entries = previous_text
+    if isinstance(previous_text, str):
+        try:
+            entries = json.loads("{" + clean_json(previous_text).strip().rstrip(",") + "}")
+        except json.JSONDecodeError:
+            return previous_text
+    if not isinstance(entries, dict):
+        return previous_text
+    return _encode_entries(entries, wire_format)
+
+def decode_wire_response(text, wire_format, expected_keys=None):
+    """
+    Turn a response in the model's wire format back into a ```json segment, so
+    process_translation_results can check it like any other response.
+    Lines that are not "<Text ID>: <text>" (preambles, remarks) are ignored. A numbered
+    line whose ID was not sent, or was already answered, is a value the model wrapped
+    onto a new line (e.g. "10:30 ...") and is joined to the previous entry.
+    """
+    if wire_format != "lines" or not text:
+        return text
+
+    expected_keys = {str(key) for key in expected_keys} if expected_keys is not None else None
+    body = re.sub(r"^```\w*\n?|\n?```$", "", text.strip().lstrip("\ufeff"), flags=re.MULTILINE)
+    entries = {}
+    last_key = None
+    for line in body.splitlines():
+        match = _WIRE_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        key = match.group(1)
+        if key in entries or (expected_keys is not None and key not in expected_keys):
+            if last_key is not None:
+                entries[last_key] += "\n" + _unescape_wire_line(line.strip())
+            continue
+        entries[key] = _unescape_wire_line(match.group(2).strip())
+        last_key = key
+    if not entries:
+        app_logger.warning("No numbered lines found in the response.")
+        return text
+    return f"```json\n{json.dumps(entries, ensure_ascii=False, indent=4)}\n```"
+
+# A complete "count": "value" pair; a value cut off by a truncated response never matches.
+# The closing quote must be followed by a comma, brace or line break, so a value broken by an
+# unescaped quote ("Il a dit "bonjour" à tous") is left to the retry instead of being cut short.
+_SALVAGE_PAIR_PATTERN = re.compile(r'"(\d+)"\s*:\s*"((?:[^"\\\n]|\\.)*)"(?=\s*[,}\n])')
+
+def salvage_translated_json(text):
+    """
+    Recover every well-formed "count": "value" pair from a response that is not valid JSON
+    (truncated output, missing commas or braces, remarks around the block).
+    
+    Returns:
+        Dict of the recovered pairs, empty if none were found
+    """
+    salvaged = {}
+    for match in _SALVAGE_PAIR_PATTERN.finditer(clean_json(text)):
+        try:
+            salvaged[match.group(1)] = json.loads(f'"{match.group(2)}"')
+        except json.JSONDecodeError:
+            continue
+    return salvaged
+
 def is_translation_valid(original, translated, src_lang, dst_lang):
     """
     Determine if a translation is valid based on language-specific rules
@@ -99,11 +209,16 @@ def is_translation_valid(original, translated, src_lang, dst_lang):
     return True
 
 def process_translation_results(original_text, translated_text, RESULT_SPLIT_JSON_PATH, FAILED_JSON_PATH, src_lang, dst_lang):
-    """Process translation results and save successful and failed translations"""
+    """
+    Process translation results and save successful and failed translations.
+    Failed entries are not saved when FAILED_JSON_PATH is None.
+    
+    Returns:
+        List of the failed entries ({"count", "value"}), empty if every entry was translated
+    """
     if not translated_text:
         app_logger.warning("No translated text received.")
-        _mark_all_as_failed(original_text, FAILED_JSON_PATH)
-        return False
+        return _mark_all_as_failed(original_text, FAILED_JSON_PATH)
 
     successful_translations = []
     failed_translations = []
@@ -113,16 +228,17 @@ def process_translation_results(original_text, translated_text, RESULT_SPLIT_JSO
         original_json = json.loads(clean_json(original_text))
     except json.JSONDecodeError as e:
         app_logger.warning(f"Failed to parse original JSON: {e}")
-        _mark_all_as_failed(original_text, FAILED_JSON_PATH)
-        return False
+        return _mark_all_as_failed(original_text, FAILED_JSON_PATH)
 
-    # Parse translated JSON
+    # Parse translated JSON, salvaging the well-formed pairs of a broken or truncated response
     try:
         translated_json = json.loads(clean_json(translated_text))
     except json.JSONDecodeError as e:
-        app_logger.warning(f"Failed to parse translated JSON: {e}")
-        _mark_all_as_failed(original_text, FAILED_JSON_PATH)
-        return False
+        translated_json = salvage_translated_json(translated_text)
+        if not translated_json:
+            app_logger.warning(f"Failed to parse translated JSON: {e}")
+            return _mark_all_as_failed(original_text, FAILED_JSON_PATH)
+        app_logger.warning(f"Failed to parse translated JSON: {e}. Salvaged {len(translated_json)} of {len(original_json)} entries.")
 
     for key, value in original_json.items():
         # Get the translated value if it exists
@@ -177,11 +293,10 @@ def process_translation_results(original_text, translated_text, RESULT_SPLIT_JSO
     save_json(RESULT_SPLIT_JSON_PATH, successful_translations)
 
     # Save failed translations
-    if failed_translations:
+    if failed_translations and FAILED_JSON_PATH:
         save_json(FAILED_JSON_PATH, failed_translations)
         app_logger.info(f"Appended {len(failed_translations)} missing or invalid translations to {FAILED_JSON_PATH}")
-        return True
-    return False
+    return failed_translations
 
 def _mark_all_as_failed(original_text, FAILED_JSON_PATH):
     failed_segments = []
@@ -195,13 +310,25 @@ def _mark_all_as_failed(original_text, FAILED_JSON_PATH):
             })
     except json.JSONDecodeError as e:
         app_logger.warning(f"Error parsing original JSON during failure marking: {e}")
-        return
+        return []
 
-    save_json(FAILED_JSON_PATH, failed_segments)
+    if FAILED_JSON_PATH:
+        save_json(FAILED_JSON_PATH, failed_segments)
     app_logger.warning("All segments marked as failed due to translation errors.")
+    return failed_segments
 
 def save_json(filepath, data):
-    """Save JSON data without overwriting existing content"""
+    """
+    Append records to a result or failed store without rewriting existing content.
+    ".jsonl" stores get one line per record, so every call costs O(len(data));
+    plain JSON files fall back to read-modify-write.
+    """
+    if filepath.endswith(".jsonl"):
+        with open(filepath, "a", encoding="utf-8") as f:
+            for item in data:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        return
+
     if os.path.exists(filepath):
         with open(filepath, "r", encoding="utf-8") as f:
             try:
@@ -220,8 +347,9 @@ def save_json(filepath, data):
 
 def check_and_sort_translations(SRC_SPLIT_JSON_PATH, RESULT_SPLIT_JSON_PATH):
     """
-    Check for missing translations and sort results.
-    If translations are missing, use the original text as translation result.
+    Check for missing translations in a single streaming pass over the result store.
+    If translations are missing, append them with the original text as translation result.
+    Ordering by count is left to recombine_split_jsons, which reads the store once.
     """
     missing_counts = set()
 
@@ -229,19 +357,11 @@ def check_and_sort_translations(SRC_SPLIT_JSON_PATH, RESULT_SPLIT_JSON_PATH):
         app_logger.error("Source or result file not found.")
         return missing_counts  # Return empty set
 
-    with open(SRC_SPLIT_JSON_PATH, "r", encoding="utf-8") as src_file:
-        try:
-            src_data = json.load(src_file)
-        except json.JSONDecodeError:
-            app_logger.error("Failed to load source JSON.")
-            return missing_counts
-
-    with open(RESULT_SPLIT_JSON_PATH, "r", encoding="utf-8") as result_file:
-        try:
-            translated_data = json.load(result_file)
-        except json.JSONDecodeError:
-            app_logger.error("Failed to load translated JSON.")
-            return missing_counts
+    try:
+        src_data = load_json_records(SRC_SPLIT_JSON_PATH)
+    except json.JSONDecodeError:
+        app_logger.error("Failed to load source JSON.")
+        return missing_counts
 
     # Ensure src_data is in list format with proper structure
     src_data_list = []
@@ -256,14 +376,26 @@ def check_and_sort_translations(SRC_SPLIT_JSON_PATH, RESULT_SPLIT_JSON_PATH):
                     item["original"] = item["value"]
                 src_data_list.append(item)
     
-    # Create a dictionary of translated items by count for quick lookup
-    translated_dict = {int(item["count"]): item for item in translated_data}
+    # Collect the translated counts without keeping the translations in memory
+    try:
+        if RESULT_SPLIT_JSON_PATH.endswith(".jsonl"):
+            translated_data = iter_jsonl(RESULT_SPLIT_JSON_PATH)
+        else:
+            translated_data = load_json_records(RESULT_SPLIT_JSON_PATH)
+        translated_counts = {
+            int(item["count"])
+            for item in translated_data
+            if isinstance(item, dict) and "count" in item
+        }
+    except json.JSONDecodeError:
+        app_logger.error("Failed to load translated JSON.")
+        return missing_counts
     
     # Convert source counts to a set for comparison
     src_counts = {int(item["count"]) for item in src_data_list}
     
     # Find missing translations
-    missing_counts = src_counts - set(translated_dict.keys())
+    missing_counts = src_counts - translated_counts
 
     # If there are missing translations, add them using original text
     if missing_counts:
@@ -273,27 +405,22 @@ def check_and_sort_translations(SRC_SPLIT_JSON_PATH, RESULT_SPLIT_JSON_PATH):
         src_dict = {int(item["count"]): item for item in src_data_list}
         
         # Add missing translations using original text
-        for count in missing_counts:
+        fallback_entries = []
+        for count in sorted(missing_counts):
             if count in src_dict:
                 original_text = src_dict[count].get("original", "")
                 if not original_text and "value" in src_dict[count]:
                     original_text = src_dict[count]["value"]
                 
                 # Create a new entry with original text as translation
-                new_entry = {
+                fallback_entries.append({
                     "count": count,
                     "original": original_text,
                     "translated": original_text  # Use original as translated
-                }
-                translated_data.append(new_entry)
+                })
+        save_json(RESULT_SPLIT_JSON_PATH, fallback_entries)
     else:
         app_logger.info("No missing counts detected. All segments are translated.")
 
-    # Sort results by count
-    sorted_data = sorted(translated_data, key=lambda x: int(x["count"]))
-
-    with open(RESULT_SPLIT_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(sorted_data, f, ensure_ascii=False, indent=4)
-
-    app_logger.info("Translation results have been sorted by count.")
+    app_logger.info("Translation results have been checked.")
     return missing_counts
\ No newline at end of file
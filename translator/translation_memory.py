@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config.log_config import app_logger
+from textProcessing.text_separator import normalize_text
+
+TM_DB_PATH = os.path.join("cache", "translation_memory.db")
+DEFAULT_MAX_SIZE_MB = 256
+EVICTION_BATCH = 1000
+
+
+def hash_prompts(*prompts):
+    """Hash the prompts that shape a translation, so prompt changes don't reuse stale results."""
+    payload = json.dumps(prompts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _source_key(normalized_text):
+    return hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Persistent cross-document translation memory stored in SQLite (WAL mode).
+    Entries are keyed by (normalized source text, src_lang, dst_lang, model, prompt hash)
+    and evicted least-recently-used first once the stored text exceeds max_size_mb.
+    """
+
+    def __init__(self, src_lang, dst_lang, model, prompt_hash, db_path=TM_DB_PATH, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.src_lang = src_lang
+        self.dst_lang = dst_lang
+        self.model = model
+        self.prompt_hash = prompt_hash
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                source_key TEXT NOT NULL,
+                src_lang TEXT NOT NULL,
+                dst_lang TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_key, src_lang, dst_lang, model, prompt_hash)
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translation_memory_last_used ON translation_memory (last_used)"
+        )
+        self.conn.commit()
+
+    def lookup(self, texts):
+        """
+        Look up several source texts at once.
+        Returns a dict mapping each normalized source text that was found to its translation.
+        """
+        keys = {}
+        for text in texts:
+            normalized = normalize_text(text)
+            if normalized:
+                keys[_source_key(normalized)] = normalized
+
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"""
+                    SELECT source_key, translation FROM translation_memory
+                    WHERE src_lang = ? AND dst_lang = ? AND model = ? AND prompt_hash = ?
+                    AND source_key IN ({placeholders})
+                    """,
+                    (self.src_lang, self.dst_lang, self.model, self.prompt_hash, *chunk),
+                ).fetchall()
+                for source_key, translation in rows:
+                    found[keys[source_key]] = translation
+
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    """
+                    UPDATE translation_memory SET last_used = ?
+                    WHERE source_key = ? AND src_lang = ? AND dst_lang = ? AND model = ? AND prompt_hash = ?
+                    """,
+                    [
+                        (now, _source_key(normalized), self.src_lang, self.dst_lang, self.model, self.prompt_hash)
+                        for normalized in found
+                    ],
+                )
+                self.conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def store(self, pairs):
+        """Store (source text, translation) pairs in one transaction, then enforce the size limit."""
+        now = time.time()
+        rows = []
+        for original, translated in pairs:
+            normalized = normalize_text(original)
+            if not normalized or not translated:
+                continue
+            size = len(normalized.encode("utf-8")) + len(translated.encode("utf-8"))
+            rows.append((
+                _source_key(normalized), self.src_lang, self.dst_lang, self.model,
+                self.prompt_hash, translated, size, now
+            ))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO translation_memory
+                (source_key, src_lang, dst_lang, model, prompt_hash, translation, size, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self.conn.commit()
+            self._evict()
+        return len(rows)
+
+    def _evict(self):
+        """Drop least recently used entries until the stored text fits in max_size."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM translation_memory").fetchone()[0]
+        evicted = 0
+        while total > self.max_size:
+            rows = self.conn.execute(
+                "SELECT rowid, size FROM translation_memory ORDER BY last_used LIMIT ?",
+                (EVICTION_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for rowid, size in rows:
+                if total <= self.max_size:
+                    break
+                victims.append((rowid,))
+                total -= size
+            self.conn.executemany("DELETE FROM translation_memory WHERE rowid = ?", victims)
+            evicted += len(victims)
+        if evicted:
+            self.conn.commit()
+            app_logger.info(f"Translation memory evicted {evicted} least recently used entries.")
+
+    def stats(self):
+        """Return hit/miss counters for this session."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()